@@ -3,7 +3,9 @@ import os
 import sys
 import warnings
 
+import orjson
 from flask import Flask
+from flask.json.provider import JSONProvider
 
 from app.extensions import cors, ma, mail
 from app.log import LOG_CONFIG
@@ -28,10 +30,26 @@ def silence_warnings(config_name):
         warnings.simplefilter("ignore")
 
 
+class ORJSONProvider(JSONProvider):
+    """
+    JSON provider backed by orjson.
+
+    Large SQL result payloads dominate response serialization time; orjson
+    encodes them several times faster than the stdlib encoder.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 def create_app(config_name):
     from app.routes import routes
 
     app = Flask(__name__)
+    app.json = ORJSONProvider(app)
 
     # Initialize configuration
     app.config.from_object(config[config_name])
@@ -46,4 +64,9 @@ def create_app(config_name):
     ma.init_app(app)
     mail.init_app(app)
 
+    # Initialize validation metrics eagerly so hot-path lookups are a plain
+    # extensions-dict read instead of lazy double-checked locking
+    from app.services.llm.tools.validation_metrics import init_app as init_validation_metrics
+    init_validation_metrics(app)
+
     return app
\ No newline at end of file
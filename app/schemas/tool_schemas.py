@@ -432,20 +432,6 @@ def sql_regeneration_output_to_dict(output: SQLRegenerationOutput) -> Dict[str,
         "validation_time": output.validation_time,
         "validation_strategy": output.validation_strategy.value
     }
-    if output.validation_time is not None:
-        result["validation_time"] = output.validation_time
-    if output.validation_strategy is not None:
-        result["validation_strategy"] = output.validation_strategy.value
-    if output.type is not None:
-        result["type"] = output.type
-    if output.requires_clarification is not None:
-        result["requires_clarification"] = output.requires_clarification
-    if output.original_query is not None:
-        result["original_query"] = output.original_query
-    if output.sql is not None:
-        result["sql"] = output.sql
-    
-    return result
 
 
 def dict_to_validation_orchestrator_input(data: Dict[str, Any]) -> ValidationOrchestratorInput:
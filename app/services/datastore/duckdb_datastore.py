@@ -1,5 +1,7 @@
 import duckdb
 import pandas as pd
+import pyarrow as pa
+import threading
 from typing import Optional, Dict, Any
 
 
@@ -21,6 +23,16 @@ class DuckDBDatastore:
             database = ':memory:'
         self.connection = duckdb.connect(database=database)
 
+    def _execute(self, query: str, parameters: Optional[Dict[str, Any]] = None):
+        """
+        Execute a query on a per-call cursor so the shared connection can be
+        used safely from multiple threads.
+        """
+        cursor = self.connection.cursor()
+        if parameters:
+            return cursor.execute(query, parameters)
+        return cursor.execute(query)
+
     def execute(
         self, query: str, parameters: Optional[Dict[str, Any]] = None
     ) -> pd.DataFrame:
@@ -34,11 +46,46 @@ class DuckDBDatastore:
         Returns:
             pd.DataFrame: The query result.
         """
-        if parameters:
-            return self.connection.execute(query, parameters).df()
-        else:
-            return self.connection.execute(query).df()
-    
+        return self._execute(query, parameters).df()
+
+    def execute_arrow(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None
+    ) -> "pa.Table":
+        """
+        Execute a SQL query and return the result as a pyarrow Table.
+
+        Avoids the pandas materialization for consumers that only need row
+        counts or plain Python records.
+
+        Args:
+            query (str): The SQL query to execute.
+            parameters (Dict[str, Any], optional): Parameters to include in the query.
+
+        Returns:
+            pa.Table: The query result as an Arrow table.
+        """
+        return self._execute(query, parameters).arrow()
+
+    def fetch_records(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None
+    ) -> list[Dict[str, Any]]:
+        """
+        Execute a SQL query and return rows as a list of dictionaries.
+
+        Builds records directly from the cursor result, avoiding the
+        intermediate DataFrame and per-row Series construction.
+
+        Args:
+            query (str): The SQL query to execute.
+            parameters (Dict[str, Any], optional): Parameters to include in the query.
+
+        Returns:
+            list: List of dictionaries, one per row.
+        """
+        result = self._execute(query, parameters)
+        columns = [desc[0] for desc in result.description]
+        return [dict(zip(columns, row)) for row in result.fetchall()]
+
 
     def get_columns(
         self, table_name: str, schema_name: Optional[str] = None
@@ -101,8 +148,22 @@ class DuckDBDatastore:
         FROM information_schema.tables
         ORDER BY table_name
         """
-        return self.execute(query).to_dict(orient="records")
+        return self.fetch_records(query)
     
+    def get_all_columns(self) -> list[Dict[str, Any]]:
+        """
+        Retrieve column information for every table in a single query.
+
+        Returns:
+            list: List of dictionaries with schema, table and column information.
+        """
+        query = """
+        SELECT table_schema, table_name, column_name, data_type, is_nullable
+        FROM information_schema.columns
+        ORDER BY table_schema, table_name, column_name
+        """
+        return self.fetch_records(query)
+
     def get_list_of_columns(
         self, table_name: str, schema_name: Optional[str] = None
     ) -> list[Dict[str, Any]]:
@@ -123,4 +184,28 @@ class DuckDBDatastore:
         WHERE table_name = '{table_name}' {schema_filter}
         ORDER BY column_name
         """
-        return self.execute(query).to_dict(orient="records")
+        return self.fetch_records(query)
+
+
+# Process-wide shared datastore for the main application database. Opening a
+# DuckDB connection re-loads the catalog, so hot paths reuse this singleton.
+_shared_datastore: Optional[DuckDBDatastore] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_datastore(database: str = "app/data/data.db") -> DuckDBDatastore:
+    """
+    Return the shared DuckDBDatastore instance for the main database.
+
+    Args:
+        database (str, optional): Path to the DuckDB database file.
+
+    Returns:
+        DuckDBDatastore: The shared datastore instance.
+    """
+    global _shared_datastore
+    if _shared_datastore is None:
+        with _shared_lock:
+            if _shared_datastore is None:
+                _shared_datastore = DuckDBDatastore(database=database)
+    return _shared_datastore
@@ -7,8 +7,35 @@ from langfuse.decorators import langfuse_context
 from litellm import completion, embedding
 from vaul import StructuredOutput
 
+import httpx
+import litellm
 import tiktoken
 
+from functools import lru_cache
+
+
+# Callers pass OpenAI-style params (n for multi-candidate sampling,
+# response_format for JSON mode) that the Bedrock Claude models here do not
+# accept; without this litellm raises UnsupportedParamsError instead of
+# completing. Dropping unsupported params degrades those calls gracefully
+# (one candidate, prompt-enforced JSON) rather than failing them.
+litellm.drop_params = True
+
+# Shared pooled HTTP client so repeated LLM calls reuse TLS sessions and
+# multiplex over HTTP/2 instead of re-handshaking per request.
+_shared_http_client: Optional[httpx.Client] = None
+
+
+def _ensure_shared_http_client() -> None:
+    """Lazily install a pooled HTTP/2 client as LiteLLM's client session."""
+    global _shared_http_client
+    if _shared_http_client is None:
+        _shared_http_client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32),
+        )
+        litellm.client_session = _shared_http_client
+
 
 class LLMSession:
     """
@@ -105,6 +132,7 @@ class LLMSession:
         :param chat_model: The chat model name.
         :param embedding_model: The embedding model name.
         """
+        _ensure_shared_http_client()
         self.chat_model = self.validate_chat_model(chat_model)
         self.embedding_model = self.validate_embedding_model(embedding_model)
         self.knn_embedding_dimensions = self._get_embedding_model_dimensions(
@@ -424,4 +452,17 @@ class LLMSession:
             return vectors
         except Exception as e:
             logger.error(f"Error generating batch embeddings: {e}")
-            raise ValueError("Error generating embeddings.") from e
\ No newline at end of file
+            raise ValueError("Error generating embeddings.") from e
+
+
+@lru_cache(maxsize=4)
+def get_shared_session(chat_model: str, embedding_model: str) -> "LLMSession":
+    """
+    Return a process-wide LLMSession for the given model pair.
+
+    Sessions hold no per-request state (every call goes through stateless
+    litellm functions over the shared pooled HTTP client), so one instance is
+    safe to share across threads; constructing per call only repeats model
+    validation and config lookups. Must be called within an app context.
+    """
+    return LLMSession(chat_model=chat_model, embedding_model=embedding_model)
\ No newline at end of file
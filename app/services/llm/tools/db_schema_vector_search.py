@@ -4,10 +4,104 @@ from typing import Dict, Any, List
 
 from app import logger
 from app.services.vector_store.vector_store_service import VectorStoreService
-from app.services.datastore.duckdb_datastore import DuckDBDatastore
+from app.services.datastore.duckdb_datastore import get_shared_datastore
+from app.services.llm.session import LLMSession
 from app.schemas.tool_schemas import DBSchemaVectorSearchInput, DBSchemaVectorSearchOutput
 
 import re
+import threading
+import time
+from functools import lru_cache
+
+
+# The compact schema summary only changes when the database schema changes,
+# so cache it briefly instead of re-querying DuckDB on every search.
+_SCHEMA_TEXT_TTL_SECONDS = 300
+_schema_text_lock = threading.Lock()
+_schema_text_cache: Dict[str, Any] = {"value": None, "expires_at": 0.0}
+
+# Token budget for the schema summary so long schemas do not inflate prompts
+_SCHEMA_TOKEN_BUDGET = 2000
+
+
+def invalidate_schema_text_cache() -> None:
+	"""Invalidate the cached schema summary (call after DDL changes)."""
+	with _schema_text_lock:
+		_schema_text_cache["value"] = None
+		_schema_text_cache["expires_at"] = 0.0
+
+
+def invalidate_vector_context_cache() -> None:
+	"""Invalidate cached vector-search context (call after re-ingestion)."""
+	_vector_context.cache_clear()
+
+
+def _assemble_schema_text(blocks: List[Any], context_text: str) -> str:
+	"""
+	Join per-table schema blocks under a token budget.
+
+	Tables mentioned in the vector-search context are emitted first; once the
+	budget is exhausted the remaining tables are summarized with a marker line.
+	"""
+	if not blocks:
+		return ""
+
+	context_lower = (context_text or "").lower()
+	prioritized = sorted(blocks, key=lambda b: 0 if b[0] and b[0] in context_lower else 1)
+
+	selected: List[str] = []
+	used_tokens = 0
+	omitted = 0
+	for _, block in prioritized:
+		block_tokens = LLMSession.count_tokens(block)
+		if selected and used_tokens + block_tokens > _SCHEMA_TOKEN_BUDGET:
+			omitted += 1
+			continue
+		selected.append(block)
+		used_tokens += block_tokens
+
+	if omitted:
+		selected.append(f"-- {omitted} more tables omitted")
+	return "\n\n".join(selected)
+
+
+@lru_cache(maxsize=256)
+def _vector_context(natural_language_query: str, n_results: int) -> str:
+	"""
+	Run the vector search for a normalized query and format the context lines.
+
+	Cached so repeated or retried queries skip the embedding call entirely.
+	Exceptions propagate so failures are not cached.
+	"""
+	vector_store = VectorStoreService(collection_name="dbschema", index_name="dbschema")
+	results: List[Dict[str, Any]] = vector_store.search(natural_language_query, n_results=n_results)
+	# logger.info(f"Vector results: {results}")
+	lines: List[str] = []
+	for item in results[:n_results]:
+		if not isinstance(item, dict):
+			continue
+		metadata = item.get("metadata", {}) or {}
+		schema_name = metadata.get("schema_name")
+		doc = (item.get("document") or item.get("chunk_text") or "")
+		if not doc:
+			continue
+		# Extract table name from text body: "Table: <name>"
+		tmatch = re.search(r"^Table:\s*(.+)$", doc, re.MULTILINE)
+		table_from_text = tmatch.group(1).strip() if tmatch else None
+		if not table_from_text:
+			table_from_text = metadata.get("table_name")
+		if not table_from_text:
+			continue
+		header = f"[{schema_name + '.' if schema_name else ''}{table_from_text}]"
+		# Extract description line
+		dmatch = re.search(r"^Description:\s*(.+)$", doc, re.MULTILINE)
+		if dmatch:
+			description = dmatch.group(1).strip()
+		else:
+			first_line = next((ln.strip() for ln in doc.splitlines() if ln.strip() and not ln.strip().lower().startswith("table:")), "")
+			description = first_line[:240]
+		lines.append(f"{header} - {description}")
+	return "\n".join(lines)
 
 
 @tool_call
@@ -26,62 +120,44 @@ def db_schema_vector_search(natural_language_query: str, n_results: int = 3) ->
 		n_results=n_results
 	)
 	
-	# Vector search for table descriptions
-	context_text = ""
+	# Vector search for table descriptions (cached per normalized query, since
+	# the embedding API round-trip dominates the cost of repeated searches)
 	try:
-		vector_store = VectorStoreService(collection_name="dbschema", index_name="dbschema")
-		results: List[Dict[str, Any]] = vector_store.search(input_data.natural_language_query, n_results=input_data.n_results)
-		# logger.info(f"Vector results: {results}")
-		lines: List[str] = []
-		for item in results[:input_data.n_results]:
-			if not isinstance(item, dict):
-				continue
-			metadata = item.get("metadata", {}) or {}
-			schema_name = metadata.get("schema_name")
-			doc = (item.get("document") or item.get("chunk_text") or "")
-			if not doc:
-				continue
-			# Extract table name from text body: "Table: <name>"
-			tmatch = re.search(r"^Table:\s*(.+)$", doc, re.MULTILINE)
-			table_from_text = tmatch.group(1).strip() if tmatch else None
-			if not table_from_text:
-				table_from_text = metadata.get("table_name")
-			if not table_from_text:
-				continue
-			header = f"[{schema_name + '.' if schema_name else ''}{table_from_text}]"
-			# Extract description line
-			dmatch = re.search(r"^Description:\s*(.+)$", doc, re.MULTILINE)
-			if dmatch:
-				description = dmatch.group(1).strip()
-			else:
-				first_line = next((ln.strip() for ln in doc.splitlines() if ln.strip() and not ln.strip().lower().startswith("table:")), "")
-				description = first_line[:240]
-			lines.append(f"{header} - {description}")
-		context_text = "\n".join(lines)
+		context_text = _vector_context(input_data.natural_language_query.strip().lower(), input_data.n_results)
 	except Exception as e:
 		logger.error(f"db_schema_vector_search: vector search failed: {e}")
 		context_text = ""
 
-	# Compact DB schema summary
-	schema_text = ""
-	try:
-		datastore = DuckDBDatastore(database="app/data/data.db")
-		tables = datastore.get_list_of_tables()
-		lines = []
-		for t in tables[:8]:
-			tbl = t.get("table_name", "")
-			sch = t.get("table_schema", "")
-			columns = datastore.get_list_of_columns(tbl, sch)
-			col_parts = [
-				f"{c.get('column_name')} {c.get('data_type')}" + (" NOT NULL" if c.get("is_nullable") == "NO" else "")
-				for c in columns[:10]
-			]
-			header = f"[{sch + '.' if sch else ''}{tbl}]"
-			lines.append(header + ("\n  - " + "\n  - ".join(col_parts) if col_parts else ""))
-		schema_text = "\n\n".join(lines)
-	except Exception as e:
-		logger.error(f"db_schema_vector_search: schema summary failed: {e}")
-		schema_text = ""
+	# Compact DB schema summary (cached, since schema rarely changes)
+	now = time.time()
+	with _schema_text_lock:
+		blocks = _schema_text_cache["value"] if now < _schema_text_cache["expires_at"] else None
+
+	if blocks is None:
+		blocks = []
+		try:
+			datastore = get_shared_datastore()
+			tables = datastore.get_list_of_tables()
+			for t in tables:
+				tbl = t.get("table_name", "")
+				sch = t.get("table_schema", "")
+				columns = datastore.get_list_of_columns(tbl, sch)
+				col_parts = [
+					f"{c.get('column_name')} {c.get('data_type')}" + (" NOT NULL" if c.get("is_nullable") == "NO" else "")
+					for c in columns[:10]
+				]
+				header = f"[{sch + '.' if sch else ''}{tbl}]"
+				blocks.append((tbl.lower(), header + ("\n  - " + "\n  - ".join(col_parts) if col_parts else "")))
+		except Exception as e:
+			logger.error(f"db_schema_vector_search: schema summary failed: {e}")
+			blocks = []
+
+		if blocks:
+			with _schema_text_lock:
+				_schema_text_cache["value"] = blocks
+				_schema_text_cache["expires_at"] = now + _SCHEMA_TEXT_TTL_SECONDS
+
+	schema_text = _assemble_schema_text(blocks, context_text)
 
 	# Return structured output
 	output = DBSchemaVectorSearchOutput(
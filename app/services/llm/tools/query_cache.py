@@ -0,0 +1,112 @@
+from typing import Dict, Any, Optional
+import sqlite3
+import threading
+import time
+
+from app import logger
+from flask import current_app
+
+
+class QueryCache:
+    """
+    Persistent cache of validated SQL keyed by a hash of the prompt inputs.
+
+    The in-memory result cache in text_to_sql resets on every Flask reload;
+    this sqlite-backed layer survives restarts so heavily repeated natural
+    language queries skip the LLM generation and validation pipeline even
+    after a redeploy. A lookup costs ~1ms versus the ~1s pipeline.
+    """
+
+    def __init__(self, db_path: str = "app/data/query_cache.db", ttl_seconds: float = 86400.0):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize the cache database with the required table."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS qcache (
+                        key TEXT PRIMARY KEY,
+                        sql TEXT,
+                        decision TEXT,
+                        feedback TEXT,
+                        ts REAL
+                    )
+                """)
+                conn.commit()
+                logger.info("Query cache database initialized")
+        except Exception as e:
+            logger.error(f"Failed to initialize query cache database: {e}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached entry for the key, or None if absent or expired.
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT sql, decision, feedback, ts FROM qcache WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            sql_text, decision, feedback, ts = row
+            if time.time() - ts > self.ttl_seconds:
+                self.delete(key)
+                return None
+            return {"sql": sql_text, "decision": decision, "feedback": feedback}
+        except Exception as e:
+            logger.error(f"Failed to read query cache: {e}")
+            return None
+
+    def put(self, key: str, sql_text: str, decision: str, feedback: str):
+        """
+        Store (or refresh) a validated SQL entry under the key.
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO qcache (key, sql, decision, feedback, ts) VALUES (?, ?, ?, ?, ?)",
+                    (key, sql_text, decision, feedback, time.time())
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to write query cache: {e}")
+
+    def delete(self, key: str):
+        """
+        Remove a cache entry (used for expired or stale SQL).
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("DELETE FROM qcache WHERE key = ?", (key,))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to delete query cache entry: {e}")
+
+    def cleanup_expired(self):
+        """
+        Drop expired entries to keep the database small.
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("DELETE FROM qcache WHERE ts < ?", (time.time() - self.ttl_seconds,))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to clean up query cache: {e}")
+
+
+# Global cache instance
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+def get_query_cache() -> QueryCache:
+    """Get the global query cache instance."""
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                db_path = current_app.config.get("QUERY_CACHE_DB", "app/data/query_cache.db")
+                _cache_instance = QueryCache(db_path)
+    return _cache_instance
@@ -0,0 +1,123 @@
+from typing import Dict, Any, List, Optional
+import hashlib
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from app import logger
+from app.services.llm.session import get_shared_session
+from flask import current_app
+
+
+# Paraphrases of the same question ("show customers in NY" vs "list NY
+# customers") miss the exact-match caches but embed close together. This
+# cache keeps embeddings of previously accepted queries and serves the stored
+# SQL when a new query lands above the similarity threshold, skipping both
+# LLM generation and validation.
+_SIMILARITY_THRESHOLD = 0.92
+_CACHE_TTL_SECONDS = 3600
+_CACHE_MAX_ENTRIES = 512
+
+_cache_lock = threading.Lock()
+_embeddings: Optional[np.ndarray] = None  # (N, dim), rows L2-normalized
+_entries: List[Dict[str, Any]] = []
+
+
+def _schema_hash(schema_text: str) -> str:
+    return hashlib.sha256(schema_text.encode()).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def _embed_normalized(text: str) -> np.ndarray:
+    """
+    Embed and L2-normalize an already-normalized text.
+
+    Memoized so repeated lookups (and the store following a miss) reuse one
+    embedding API call per distinct query. Raises on failure so errors are
+    never cached; callers treat the returned array as read-only.
+    """
+    llm = get_shared_session(
+        current_app.config.get("CHAT_MODEL"),
+        current_app.config.get("EMBEDDING_MODEL"),
+    )
+    vectors = llm.get_embeddings([text])
+    if not vectors:
+        raise ValueError("empty embedding response")
+    vector = np.asarray(vectors[0], dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        raise ValueError("zero-norm embedding")
+    return vector / norm
+
+
+def _embed_query(natural_language_query: str) -> Optional[np.ndarray]:
+    """
+    Embed and L2-normalize a query; returns None if embedding fails.
+    """
+    try:
+        return _embed_normalized(natural_language_query.strip().lower())
+    except Exception as e:
+        logger.error(f"semantic_sql_cache: embedding failed: {e}")
+        return None
+
+
+def semantic_cache_lookup(natural_language_query: str, schema_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Return {"sql", "feedback", "similarity"} for the closest cached query, or
+    None when nothing similar enough (same schema, above threshold) exists.
+    """
+    with _cache_lock:
+        has_entries = _embeddings is not None and len(_entries) > 0
+    if not has_entries:
+        return None
+
+    query_vector = _embed_query(natural_language_query)
+    if query_vector is None:
+        return None
+
+    schema_fingerprint = _schema_hash(schema_text)
+    now = time.time()
+    with _cache_lock:
+        if _embeddings is None or not _entries:
+            return None
+        similarities = _embeddings @ query_vector
+        best = int(np.argmax(similarities))
+        entry = _entries[best]
+        similarity = float(similarities[best])
+
+    if similarity < _SIMILARITY_THRESHOLD:
+        return None
+    if entry["schema_hash"] != schema_fingerprint or now - entry["ts"] > _CACHE_TTL_SECONDS:
+        return None
+
+    logger.info(f"semantic_sql_cache: hit with similarity {similarity:.3f}")
+    return {"sql": entry["sql"], "feedback": entry["feedback"], "similarity": similarity}
+
+
+def semantic_cache_store(natural_language_query: str, sql_text: str, schema_text: str, feedback: str = "") -> None:
+    """
+    Add an accepted (query, sql) pair to the cache.
+    """
+    query_vector = _embed_query(natural_language_query)
+    if query_vector is None:
+        return
+
+    global _embeddings
+    entry = {
+        "sql": sql_text,
+        "feedback": feedback,
+        "schema_hash": _schema_hash(schema_text),
+        "ts": time.time(),
+    }
+    with _cache_lock:
+        if _embeddings is None:
+            _embeddings = query_vector[np.newaxis, :]
+            _entries.append(entry)
+        else:
+            _embeddings = np.vstack([_embeddings, query_vector])
+            _entries.append(entry)
+            if len(_entries) > _CACHE_MAX_ENTRIES:
+                _embeddings = _embeddings[1:]
+                _entries.pop(0)
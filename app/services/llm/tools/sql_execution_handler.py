@@ -6,6 +6,8 @@ import re
 from app import logger
 from app.services.datastore.duckdb_datastore import DuckDBDatastore
 from app.services.llm.tools.sql_execution_analyzer import sql_execution_analyzer
+from app.services.llm.tools.strict_schema_validator import invalidate_schema_cache
+from app.services.llm.tools.db_schema_vector_search import invalidate_schema_text_cache, invalidate_vector_context_cache
 from app.controllers.scan_controller import ScanController
 from app.schemas.tool_schemas import (
     SQLExecutionInput, SQLExecutionOutput, DecisionType,
@@ -61,12 +63,21 @@ def sql_execution_handler(sql_query: str, user_response: str, original_feedback:
             # Check if this is a CREATE statement and trigger automatic scan
             sql_lower = input_data.sql_query.lower().strip()
             is_create_statement = sql_lower.startswith("create")
-            
+            is_ddl_statement = sql_lower.startswith(("create", "drop", "alter"))
+
             logger.info(f"SQL execution completed. SQL: {input_data.sql_query[:100]}...")
             logger.info(f"Is CREATE statement: {is_create_statement}")
-            
+
             feedback = "Query executed successfully after user confirmation"
-            
+
+            # Verified DDL is the path every DROP/ALTER takes; without this
+            # the validators keep approving queries against the old schema
+            # from their caches until the TTL expires
+            if is_ddl_statement:
+                invalidate_schema_cache()
+                invalidate_schema_text_cache()
+                invalidate_vector_context_cache()
+
             # Add scan notification to feedback if it's a CREATE statement
             if is_create_statement:
                 logger.info("CREATE statement detected in execution handler, triggering automatic scan...")
@@ -1,16 +1,48 @@
 from langfuse.decorators import observe
 from vaul import tool_call
 from typing import Dict, Any, List, Set
+from collections import defaultdict
 import re
+import threading
+import time
 
 from app import logger
-from app.services.datastore.duckdb_datastore import DuckDBDatastore
+from app.services.datastore.duckdb_datastore import get_shared_datastore
 from app.services.llm.session import LLMSession
 from flask import current_app
 
 import json
 
 
+# The database schema rarely changes within a process lifetime, so cache the
+# DuckDB schema walk for a few minutes instead of re-querying on every validation.
+_SCHEMA_CACHE_TTL_SECONDS = 300
+_schema_cache_lock = threading.Lock()
+_schema_cache: Dict[str, Any] = {"value": None, "expires_at": 0.0}
+
+
+def invalidate_schema_cache() -> None:
+    """
+    Invalidate the cached database schema.
+
+    Should be called after DDL statements (CREATE/DROP/ALTER) so the next
+    validation re-reads the actual schema from DuckDB.
+    """
+    with _schema_cache_lock:
+        _schema_cache["value"] = None
+        _schema_cache["expires_at"] = 0.0
+
+
+def warm_schema_cache() -> None:
+    """
+    Populate the schema cache ahead of validation.
+
+    Called by text_to_sql while the generation LLM call is in flight so the
+    validators find a warm cache instead of paying the DuckDB catalog query.
+    """
+    _get_actual_database_schema()
+
+
 @tool_call
 @observe
 def strict_schema_validator(
@@ -48,23 +80,50 @@ def strict_schema_validator(
             "feedback": "No SQL query provided for validation"
         }
     
+    # Fast path: literal-only SELECTs (e.g. the "data not available" fallback
+    # message) reference no schema objects, so skip the schema walk and any
+    # LLM work entirely
+    stripped = sql_query.strip().lower()
+    if stripped.startswith("select") and not re.search(r"\bfrom\b", stripped):
+        return {
+            "is_valid": True,
+            "validation_result": "pass",
+            "issues": [],
+            "suggestions": [],
+            "missing_tables": [],
+            "missing_columns": [],
+            "feedback": "Literal SELECT does not reference any schema objects"
+        }
+
     try:
         # Step 1: Extract table and column references from SQL
         extracted_refs = _extract_schema_references(sql_query)
-        
-        # Step 2: Get actual database schema
+
+        # Step 2: Validate references against the actual schema (cheap, cached)
         actual_schema = _get_actual_database_schema()
-        
-        # Step 3: Validate references against actual schema
         validation_result = _validate_schema_references(
             extracted_refs, actual_schema, user_query
         )
-        
-        # Step 4: Use LLM for context-aware validation
+
+        # Step 3: When every referenced table and column exists, the technical
+        # check is authoritative — skip the second LLM round-trip entirely
+        if not validation_result["missing_tables"] and not validation_result["missing_columns"]:
+            logger.info("Schema validation result: pass (technical check only)")
+            return {
+                "is_valid": True,
+                "validation_result": "pass",
+                "issues": [],
+                "suggestions": validation_result.get("suggestions", []),
+                "missing_tables": [],
+                "missing_columns": [],
+                "feedback": "All referenced tables and columns exist in the database schema"
+            }
+
+        # Step 4: Use LLM for context-aware validation of the mismatches
         llm_validation = _llm_schema_validation(
             sql_query, db_schema, user_query, validation_result
         )
-        
+
         # Step 5: Combine results
         final_result = _combine_validation_results(validation_result, llm_validation)
         
@@ -84,6 +143,22 @@ def strict_schema_validator(
         }
 
 
+def quick_reference_check(sql_query: str) -> Dict[str, List[str]]:
+    """
+    Cheap, LLM-free reference check for ranking candidate SQL queries.
+
+    Returns the missing table and column references for the query against
+    the cached database schema.
+    """
+    extracted_refs = _extract_schema_references(sql_query)
+    actual_schema = _get_actual_database_schema()
+    result = _validate_schema_references(extracted_refs, actual_schema, "")
+    return {
+        "missing_tables": result["missing_tables"],
+        "missing_columns": result["missing_columns"]
+    }
+
+
 def _extract_schema_references(sql_query: str) -> Dict[str, Any]:
     """
     Extract table and column references from SQL query.
@@ -143,41 +218,70 @@ def _extract_schema_references(sql_query: str) -> Dict[str, Any]:
 
 def _get_actual_database_schema() -> Dict[str, Any]:
     """
-    Get actual database schema from DuckDB.
+    Get actual database schema from DuckDB, using a short-lived TTL cache.
+    """
+    now = time.time()
+    with _schema_cache_lock:
+        if _schema_cache["value"] is not None and now < _schema_cache["expires_at"]:
+            return _schema_cache["value"]
+
+    schema_info = _load_actual_database_schema()
+
+    # Only cache successful loads; the empty fallback should be retried
+    if schema_info["tables"]:
+        with _schema_cache_lock:
+            _schema_cache["value"] = schema_info
+            _schema_cache["expires_at"] = now + _SCHEMA_CACHE_TTL_SECONDS
+
+    return schema_info
+
+
+def _load_actual_database_schema() -> Dict[str, Any]:
+    """
+    Load the actual database schema from DuckDB.
     """
     try:
-        datastore = DuckDBDatastore(database="app/data/data.db")
-        tables = datastore.get_list_of_tables()
-        
-        schema_info = {
-            "tables": {},
-            "all_tables": set(),
-            "all_columns": set()
-        }
-        
-        for table_info in tables:
-            table_name = table_info.get("table_name", "")
-            schema_name = table_info.get("table_schema", "")
-            
-            # Get columns for this table
-            columns = datastore.get_list_of_columns(table_name, schema_name)
-            column_names = [col.get("column_name", "") for col in columns]
-            
-            # Store table info
-            full_table_name = f"{schema_name}.{table_name}" if schema_name else table_name
-            schema_info["tables"][full_table_name] = {
+        datastore = get_shared_datastore()
+
+        # Fetch all column metadata in one query instead of one query per table
+        columns_by_table = defaultdict(list)
+        for col in datastore.get_all_columns():
+            key = (col.get("table_schema", ""), col.get("table_name", ""))
+            columns_by_table[key].append(col.get("column_name", ""))
+
+        tables = {
+            (f"{schema_name}.{table_name}" if schema_name else table_name): {
                 "columns": column_names,
                 "schema": schema_name,
                 "name": table_name
             }
-            
-            # Add to sets for quick lookup
-            schema_info["all_tables"].add(table_name.lower())
-            schema_info["all_tables"].add(full_table_name.lower())
-            
-            for col in column_names:
-                schema_info["all_columns"].add(col.lower())
-        
+            for (schema_name, table_name), column_names in columns_by_table.items()
+        }
+
+        # Per-table column sets for O(1) scoped lookups, keyed by both the
+        # qualified and bare table names
+        cols_by_table = {}
+        for name, info in tables.items():
+            cols = frozenset(col.lower() for col in info["columns"])
+            cols_by_table[name.lower()] = cols
+            cols_by_table.setdefault(info["name"].lower(), cols)
+
+        # Build the lookup sets in single passes instead of per-item adds
+        schema_info = {
+            "tables": tables,
+            "all_tables": (
+                {info["name"].lower() for info in tables.values()}
+                | {name.lower() for name in tables}
+            ),
+            "all_columns": {
+                col.lower() for info in tables.values() for col in info["columns"]
+            },
+            "cols_by_table": cols_by_table
+        }
+
+        # Precompute the suggestion string once; the hot path only reads it
+        schema_info["sorted_tables_csv"] = ", ".join(sorted(schema_info["all_tables"]))
+
         return schema_info
         
     except Exception as e:
@@ -185,7 +289,9 @@ def _get_actual_database_schema() -> Dict[str, Any]:
         return {
             "tables": {},
             "all_tables": set(),
-            "all_columns": set()
+            "all_columns": set(),
+            "cols_by_table": {},
+            "sorted_tables_csv": ""
         }
 
 
@@ -208,15 +314,35 @@ def _validate_schema_references(
             missing_tables.append(table)
             issues.append(f"Table '{table}' does not exist in the database")
     
-    # Validate columns (basic check - we'll do more detailed validation with LLM)
+    # Scope column validation to the referenced tables when they are all
+    # known; otherwise fall back to the union of all columns
+    cols_by_table = actual_schema.get("cols_by_table", {})
+    referenced_tables = [t.lower() for t in extracted_refs["tables"]]
+    known_tables = [t for t in referenced_tables if t in cols_by_table]
+    if known_tables and len(known_tables) == len(referenced_tables):
+        scoped_columns = frozenset().union(*(cols_by_table[t] for t in known_tables))
+    else:
+        scoped_columns = actual_schema["all_columns"]
+
     for column in extracted_refs["columns"]:
-        if column.lower() not in actual_schema["all_columns"]:
+        col = column.lower()
+        if "." in col:
+            # Qualified reference: check against that table's own columns
+            table_part, _, col_part = col.rpartition(".")
+            table_cols = cols_by_table.get(table_part.split(".")[-1])
+            if table_cols is not None:
+                if col_part not in table_cols:
+                    missing_columns.append(column)
+                    issues.append(f"Column '{col_part}' does not exist in table '{table_part}'")
+                continue
+            col = col_part
+        if col not in scoped_columns:
             missing_columns.append(column)
             issues.append(f"Column '{column}' does not exist in any table")
     
     # Generate suggestions
     if missing_tables:
-        suggestions.append(f"Available tables: {', '.join(sorted(actual_schema['all_tables']))}")
+        suggestions.append(f"Available tables: {actual_schema.get('sorted_tables_csv', '')}")
     
     if missing_columns:
         suggestions.append("Please check column names against the actual schema")
@@ -231,6 +357,20 @@ def _validate_schema_references(
     }
 
 
+def _strip_json_fences(text: str) -> str:
+    """
+    Remove a ```json code fence around a model response, if present.
+
+    Bedrock models drop the response_format JSON hint (litellm.drop_params),
+    so fenced responses remain common and must be unwrapped before parsing.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```(?:json)?\s*", "", text)
+        text = re.sub(r"\s*```$", "", text)
+    return text
+
+
 def _llm_schema_validation(
     sql_query: str,
     db_schema: str,
@@ -281,59 +421,53 @@ def _llm_schema_validation(
             "Please validate this SQL query against the schema and user intent."
         )
         
-        response = llm.chat(
+        # Stream the response and stop as soon as a complete JSON object has
+        # arrived, trimming the tail latency of long completions
+        content = ""
+        parsed = None
+        brace_depth = 0
+        seen_object_start = False
+        for delta in llm.chat_stream(
             messages=[
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": user_message},
-            ]
-        )
-        content = response.choices[0].message.content or ""
-        
-        # Parse JSON response
-        try:
-            # Extract JSON from response if wrapped in code blocks
-            json_match = re.search(r"```json\s*([\s\S]*?)\s*```", content, re.IGNORECASE)
-            if json_match:
-                content = json_match.group(1)
-            
-            # Also try to extract JSON if just wrapped in ```
-            if not json_match:
-                json_match = re.search(r"```\s*([\s\S]*?)\s*```", content)
-                if json_match:
-                    content = json_match.group(1)
-            
-            parsed = json.loads(content)
-            
-            return {
-                "validation_result": parsed.get("validation_result", "fail"),
-                "issues": parsed.get("issues", []),
-                "suggestions": parsed.get("suggestions", []),
-                "feedback": parsed.get("feedback", ""),
-                "needs_clarification": parsed.get("needs_clarification", False)
-            }
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
-            logger.error(f"Raw response: {content}")
-            
-            # Fallback: check if response indicates issues
-            if any(keyword in content.lower() for keyword in ["missing", "doesn't exist", "invalid", "error"]):
+            ],
+            response_format={"type": "json_object"}
+        ):
+            content += delta
+            brace_depth += delta.count("{") - delta.count("}")
+            seen_object_start = seen_object_start or "{" in delta
+            if seen_object_start and brace_depth <= 0:
+                try:
+                    parsed = json.loads(_strip_json_fences(content))
+                    break
+                except json.JSONDecodeError:
+                    # Braces inside string values; keep streaming
+                    continue
+
+        if parsed is None:
+            # Fall back to parsing the full buffer
+            try:
+                parsed = json.loads(_strip_json_fences(content))
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse LLM response as JSON: {e}")
+                logger.error(f"Raw response: {content}")
                 return {
-                    "validation_result": "clarification_needed",
-                    "issues": ["Schema validation issues detected"],
-                    "suggestions": ["Please check table and column names"],
+                    "validation_result": "fail",
+                    "issues": ["LLM returned malformed validation response"],
+                    "suggestions": ["Please try again"],
                     "feedback": content[:500],
-                    "needs_clarification": True
-                }
-            else:
-                return {
-                    "validation_result": "pass",
-                    "issues": [],
-                    "suggestions": [],
-                    "feedback": "Schema validation passed",
                     "needs_clarification": False
                 }
-                
+
+        return {
+            "validation_result": parsed.get("validation_result", "fail"),
+            "issues": parsed.get("issues", []),
+            "suggestions": parsed.get("suggestions", []),
+            "feedback": parsed.get("feedback", ""),
+            "needs_clarification": parsed.get("needs_clarification", False)
+        }
+
     except Exception as e:
         logger.error(f"Error in LLM schema validation: {e}")
         return {
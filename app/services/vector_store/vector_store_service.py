@@ -1,9 +1,13 @@
 from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from flask import current_app
 import uuid
 
 from app import logger
 from app.services.llm.session import LLMSession
+from app.services.vector_store.duckdb_vector_store import DuckDBVectorStore
 
 # Vector store imports
 from pinecone import Pinecone, ServerlessSpec
@@ -11,6 +15,28 @@ from pinecone import Pinecone, ServerlessSpec
 from langfuse.decorators import observe
 
 
+# Documents per embedding API call and vectors per Pinecone upsert request.
+# Decoupling the two lets upserts for one chunk run while the next chunk is
+# still being embedded.
+_EMBEDDING_CHUNK_SIZE = 1000
+_UPSERT_BATCH_SIZE = 100
+
+
+@lru_cache(maxsize=1024)
+def _cached_query_embedding(embedding_model: str, query: str) -> tuple:
+    """
+    Embed a search query, memoized per (model, query).
+
+    Repeat searches (retry loops, dashboards, agents re-asking the same
+    question) skip the embedding round-trip entirely. Returns a tuple so
+    cached values are immutable; raises on failure so errors are not cached.
+    """
+    vectors = LLMSession(embedding_model=embedding_model).get_embeddings([query])
+    if not vectors:
+        raise ValueError("empty embedding response")
+    return tuple(vectors[0])
+
+
 class VectorStoreService:
     """
     A service for managing vector embeddings and vector stores.
@@ -42,17 +68,23 @@ class VectorStoreService:
         self._init_pinecone()
     
     def _init_pinecone(self):
-        """Initialize Pinecone vector store."""
+        """Initialize Pinecone vector store, or the local fallback without an API key."""
+        self.local_store = None
         try:
             # Get Pinecone configuration
             api_key = current_app.config.get("PINECONE_API_KEY")
             
             if not api_key:
-                logger.warning("PINECONE_API_KEY not found in configuration - vector store will be disabled")
+                logger.warning("PINECONE_API_KEY not found in configuration - falling back to local DuckDB vector store")
                 self.pc = None
                 self.index = None
+                self.local_store = DuckDBVectorStore(
+                    db_path=current_app.config.get("LOCAL_VECTOR_STORE_PATH", "app/data/vector_store.duckdb"),
+                    namespace=self.namespace,
+                    dimensions=getattr(self.llm_session, 'knn_embedding_dimensions', 1536)
+                )
                 return
-            
+
             # Initialize Pinecone client
             self.pc = Pinecone(api_key=api_key)
             
@@ -75,10 +107,15 @@ class VectorStoreService:
                             region="us-east-1"
                         )
                     )
-                    # Wait for index to be ready
+                    # Poll until the index is ready instead of a fixed 10s
+                    # sleep; serverless indexes usually come up in about 1s
                     import time
-                    time.sleep(10)
-                    
+                    for _ in range(30):
+                        description = self.pc.describe_index(self.index_name)
+                        if description.status.get("ready"):
+                            break
+                        time.sleep(0.5)
+
             except Exception as e:
                 logger.warning(f"Index creation failed: {e}")
                 # Continue with existing index if creation fails
@@ -109,50 +146,87 @@ class VectorStoreService:
         Returns:
             List of document IDs
         """
-        # Check if Pinecone is initialized
-        if not self.pc or not self.index:
-            logger.warning("Pinecone not initialized - cannot add documents")
-            return []
-            
         if not documents:
             return []
-        
+
+        # Check if Pinecone is initialized
+        if not self.pc or not self.index:
+            if self.local_store is None:
+                logger.warning("Vector store not initialized - cannot add documents")
+                return []
+            return self._add_documents_local(documents, metadata, ids)
+
         # Generate IDs if not provided
         if ids is None:
             ids = [str(uuid.uuid4()) for _ in range(len(documents))]
-        
+
         try:
-            # Generate embeddings for all documents
-            embeddings = self.llm_session.get_embeddings(documents)
-            
-            # Prepare vectors for upsert
-            vectors_to_upsert = []
-            for i, (doc_id, document, embedding) in enumerate(zip(ids, documents, embeddings)):
-                # Prepare metadata
-                doc_metadata = {"chunk_text": document}
-                if metadata and i < len(metadata):
-                    doc_metadata.update(metadata[i])
-                
-                vector_data = {
-                    "id": doc_id,
-                    "values": embedding,
-                    "metadata": doc_metadata
-                }
-                vectors_to_upsert.append(vector_data)
-            
-            # Upsert vectors to Pinecone
-            self.index.upsert(
-                vectors=vectors_to_upsert,
-                namespace=self.namespace
-            )
-            
+            # Embed in large chunks and upsert in Pinecone-sized batches on a
+            # small pool, so upsert round-trips overlap embedding the next chunk
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                upserts = []
+                for chunk_start in range(0, len(documents), _EMBEDDING_CHUNK_SIZE):
+                    chunk_end = chunk_start + _EMBEDDING_CHUNK_SIZE
+                    embeddings = self.llm_session.get_embeddings(documents[chunk_start:chunk_end])
+
+                    # Build vector records lazily and peel off upsert-sized
+                    # batches, so only in-flight batches are materialized
+                    # instead of the whole chunk's worth of dicts
+                    def _iter_vectors(start, chunk_embeddings):
+                        for i, embedding in enumerate(chunk_embeddings, start=start):
+                            doc_metadata = {"chunk_text": documents[i]}
+                            if metadata and i < len(metadata):
+                                doc_metadata.update(metadata[i])
+                            yield {
+                                "id": ids[i],
+                                "values": embedding,
+                                "metadata": doc_metadata
+                            }
+
+                    vector_iter = _iter_vectors(chunk_start, embeddings)
+                    while True:
+                        batch = list(islice(vector_iter, _UPSERT_BATCH_SIZE))
+                        if not batch:
+                            break
+                        upserts.append(pool.submit(
+                            self.index.upsert,
+                            vectors=batch,
+                            namespace=self.namespace
+                        ))
+
+                for upsert in upserts:
+                    upsert.result()
+
             logger.info(f"Added {len(documents)} documents to Pinecone index: {self.index_name}, namespace: {self.namespace}")
             return ids
-            
+
         except Exception as e:
             logger.error(f"Failed to add documents to Pinecone: {e}")
             raise
-    
+
+    def _add_documents_local(
+        self,
+        documents: List[str],
+        metadata: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents to the local DuckDB store."""
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in range(len(documents))]
+
+        try:
+            embeddings = self.llm_session.get_embeddings(documents)
+            metadatas = [
+                metadata[i] if metadata and i < len(metadata) else {}
+                for i in range(len(documents))
+            ]
+            self.local_store.upsert(ids, documents, metadatas, embeddings)
+            logger.info(f"Added {len(documents)} documents to local vector store, namespace: {self.namespace}")
+            return ids
+        except Exception as e:
+            logger.error(f"Failed to add documents to local vector store: {e}")
+            raise
+
     @observe()
     def search(
         self,
@@ -173,18 +247,15 @@ class VectorStoreService:
         """
         # Check if Pinecone is initialized
         if not self.pc or not self.index:
-            logger.warning("Pinecone not initialized - returning empty results")
-            return []
-        
-        try:
-            # Generate query embedding
-            query_embeddings = self.llm_session.get_embeddings([query])
-            if not query_embeddings:
-                logger.error("Failed to generate query embedding")
+            if self.local_store is None:
+                logger.warning("Vector store not initialized - returning empty results")
                 return []
-            
-            query_embedding = query_embeddings[0]
-            
+            return self._search_local(query, n_results, filter_metadata)
+
+        try:
+            # Generate query embedding (memoized per model and query text)
+            query_embedding = list(_cached_query_embedding(self.embedding_model, query))
+
             # Prepare query parameters
             query_params = {
                 "vector": query_embedding,
@@ -218,13 +289,29 @@ class VectorStoreService:
         except Exception as e:
             logger.error(f"Search failed: {e}")
             return []
-            
+
+    def _search_local(self, query: str, n_results: int = 5,
+                      filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Search the local DuckDB store, returning the same result shape."""
+        try:
+            query_embedding = list(_cached_query_embedding(self.embedding_model, query))
+            results = self.local_store.query(query_embedding, top_k=n_results, filter_metadata=filter_metadata)
+            logger.info(f"Found {len(results)} results in local vector store for query")
+            return results
+        except Exception as e:
+            logger.error(f"Local vector store search failed: {e}")
+            return []
+
     def delete_collection(self):
         """Delete the current namespace (collection)."""
         if not self.pc or not self.index:
-            logger.warning("Pinecone not initialized - cannot delete collection")
+            if self.local_store is not None:
+                self.local_store.delete_all()
+                logger.info(f"Deleted all vectors from local namespace: {self.namespace}")
+            else:
+                logger.warning("Vector store not initialized - cannot delete collection")
             return
-            
+
         try:
             # Delete all vectors in the namespace
             self.index.delete(delete_all=True, namespace=self.namespace)
@@ -237,9 +324,13 @@ class VectorStoreService:
     def delete_documents(self, ids: List[str]):
         """Delete specific documents by their IDs."""
         if not self.pc or not self.index:
-            logger.warning("Pinecone not initialized - cannot delete documents")
+            if self.local_store is not None:
+                self.local_store.delete(ids)
+                logger.info(f"Deleted {len(ids)} documents from local namespace: {self.namespace}")
+            else:
+                logger.warning("Vector store not initialized - cannot delete documents")
             return
-            
+
         try:
             self.index.delete(ids=ids, namespace=self.namespace)
             logger.info(f"Deleted {len(ids)} documents from namespace: {self.namespace}")
@@ -250,8 +341,15 @@ class VectorStoreService:
     def get_collection_info(self) -> Dict[str, Any]:
         """Get information about the current collection."""
         if not self.pc or not self.index:
-            return {"error": "Pinecone not initialized"}
-            
+            if self.local_store is not None:
+                return {
+                    "vector_store_type": "duckdb",
+                    "namespace": self.namespace,
+                    "embedding_model": self.embedding_model,
+                    "namespace_vector_count": self.local_store.count()
+                }
+            return {"error": "Vector store not initialized"}
+
         try:
             stats = self.index.describe_index_stats()
             namespace_stats = stats.get('namespaces', {}).get(self.namespace, {})
@@ -281,9 +379,12 @@ class VectorStoreService:
     def update_document(self, doc_id: str, document: str, metadata: Optional[Dict[str, Any]] = None):
         """Update a specific document."""
         if not self.pc or not self.index:
-            logger.warning("Pinecone not initialized - cannot update document")
+            if self.local_store is not None:
+                self._add_documents_local([document], [metadata or {}], [doc_id])
+            else:
+                logger.warning("Vector store not initialized - cannot update document")
             return
-            
+
         try:
             # Generate new embedding
             embedding = self.llm_session.get_embeddings([document])[0]